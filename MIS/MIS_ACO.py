@@ -1,51 +1,141 @@
 import rustworkx as rx
+import numpy as np
+import multiprocessing
+from multiprocessing import shared_memory
+from random import random, randrange, seed, getrandbits
 
-from numpy.random import choice
+from .graph import mis_graph, neighbor_arrays, csr_adjacency, degrees, cached_array
+from . import anytime
+
+# Cantidad maxima de elementos (nodos del bloque x n) de la matriz de vecinos de vecinos de compute_heuristic
+HEURISTIC_CHUNK = 1 << 24
+
+# Estado de cada proceso de la colonia paralela (ver init_colony_worker)
+colony_memory = None
+colony_neighbors = None
+colony_node_indexes = None
+
+
+def compute_heuristic(G):
+    """
+    Funcion que calcula la heuristica de todos los nodos de G a la vez sobre la adyacencia CSR. Los vecinos de
+    los vecinos se marcan por bloques de nodos en una matriz de booleanos de bloque x n: cada nodo w es vecino
+    de vecino de todos los pares de nodos de N(w). Las sumas de sus grados y grados al cuadrado son productos
+    matriz-vector
+
+    :param G: grafo G
+    :return: arreglo con el valor de la heuristica de cada nodo
+    """
+    indptr, indices = csr_adjacency(G)
+    nbrs = neighbor_arrays(G)
+    degree = degrees(G)
+    size = len(degree)
+    rows = max(1, HEURISTIC_CHUNK // max(size, 1))
+
+    count_neighbors_of_neighbors = np.zeros(size)
+    sum_degree_neighbors_of_neighbors = np.zeros(size)
+    sum_degree_squares_neighbors_of_neighbors = np.zeros(size)
+    for start in range(0, size, rows):
+        end = min(size, start + rows)
+        two_hop = np.zeros((end - start, size), dtype=bool)
+        # Solo los vecinos de los nodos del bloque aportan caminos de largo 2 que salen del bloque
+        for w in np.unique(indices[indptr[start]:indptr[end]]).tolist():
+            N = nbrs[w]
+            block = N[np.searchsorted(N, start):np.searchsorted(N, end)]
+            two_hop[np.ix_(block - start, N)] = True
+
+        count_neighbors_of_neighbors[start:end] = two_hop.sum(axis=1)
+        sum_degree_neighbors_of_neighbors[start:end] = two_hop @ degree
+        sum_degree_squares_neighbors_of_neighbors[start:end] = two_hop @ (degree * degree)
+
+    # El 1 es incluido para evitar ceros.
+    return (count_neighbors_of_neighbors + 1) * (sum_degree_squares_neighbors_of_neighbors + 1) / ((1/2 * sum_degree_neighbors_of_neighbors) + 1)
+
+
+def heuristic_table(G):
+    """
+    Tabla con la heuristica de cada nodo de G. Se calcula una vez por grafo y, si G se cargo de un archivo,
+    se guarda en disco junto a el para reutilizarla en otras ejecuciones
+
+    :param G: grafo G
+    :return: arreglo con el valor de la heuristica de cada nodo, indexado por indice de nodo
+    """
+    return cached_array(G, "aco_heuristic", compute_heuristic)
 
 
 def heuristic(G, v):
     """
     Valor de la heuristica del nodo v para un grafo dado G siendo esta la informacion local
 
+    Por la definición del conjunto independiente si el vértice tiene un grado alto, entonces
+    tiene menos posibilidades de estar incluido en un conjunto independiente máximo. Pero, ademas
+    nos interesa que los vecinos de los vecinos del vertice sean muchos, con pocos lados conectandolos:
+    (|N2(v)| + 1) * (suma de grados^2 en N2(v) + 1) / (suma de grados en N2(v) / 2 + 1)
+
     :param G: grafo a considerar que contiene a v
     :param v: vertice al que le queremos calcular su heuristica
     :return: valor de la heuristica
     """
+    return float(heuristic_table(G)[v])
 
-    # Por la definición del conjunto independiente si el vértice tiene un grado alto, entonces
-    # tiene menos posibilidades de estar incluido en un conjunto independiente máximo. Pero, ademas
-    # nos interesa que los vecinos de los vecinos del vertice sean muchos,
-    # con pocos lados conectandolos 
-    neighbors = set(G.neighbors(v))
-
-    neighbors_of_neighbors = set()
-    for u in neighbors:
-        neighbors_of_neighbors = neighbors_of_neighbors.union(
-            set(G.neighbors(u)))
 
-    sum_degree_neighbors_of_neighbors = sum(
-        [G.degree(u) for u in neighbors_of_neighbors])
-    sum_degree_squares_neighbors_of_neighbors = sum(
-        [pow(G.degree(u), 2) for u in neighbors_of_neighbors])
+def selection_weights(pheromone_trail, heuristic_values, alpha, beta):
+    """
+    Peso de seleccion tau^alpha * eta^beta de cada nodo. La probabilidad de seleccionar un v del complemento de
+    la solucion de una hormiga es su peso dividido por la suma de los pesos del complemento
 
-    # El 1 es incluido para evitar ceros.
-    return (len(neighbors_of_neighbors) + 1) * (sum_degree_squares_neighbors_of_neighbors + 1) / ((1/2 * sum_degree_neighbors_of_neighbors) + 1)
+    :param pheromone_trail: arreglo con el valor de la feromona de cada nodo en el nivel anterior
+    :param heuristic_values: arreglo con el valor de la heuristica de cada nodo
+    :param alpha: relevancia de la informacion flobal (el rastro de la feromona). Debe estar entre 0 y 1
+    :param beta: relevancia de la informacion local (heuristica). Debe estar entre 0 y 1
+    :return: arreglo con el peso de cada nodo
+    """
+    return np.power(pheromone_trail, alpha) * np.power(heuristic_values, beta)
 
 
-def probability(complement_Sk, v_heuristic, pheromone_trail, alpha, beta):
+def ant_solution(neighbors, weights, node_indexes):
     """
-    Probabilidad de seleccionar un v que no este en el conjunto solucion de la hormiga k sino en su complemento
+    Construye la solucion de una hormiga: parte de un nodo al azar y agrega nodos del complemento (nodos que no
+    estan en la solucion ni son vecinos de ella) con probabilidad proporcional a su peso, hasta vaciarlo.
+    Los pesos del complemento se guardan en un arreglo donde los nodos que salen del complemento valen 0,
+    y cada seleccion es una busqueda binaria sobre su suma acumulada.
 
-    :param complement_Sk: complemento de la solucion de la hormiga
-    :param v_heuristic: tupla del (v, heuristic) del nodo considerado donde v es el nodo, heuristic es el valor de su heuristica en el grafo considerado por la hormiga
-    :param pheromone_trail: valor de la feromona en el nivel anterior.
-    :param alpha: relevancia de la informacion flobal (el rastro de la feromona). Debe estar entre 0 y 1
-    :param beta: relevancia de la informacion local (heuristica). Debe estar entre 0 y 1
-    :return: probabilidad de seleccionas v en v_heuristic
+    :param neighbors: arreglos de vecinos de cada nodo
+    :param weights: arreglo con el peso de seleccion de cada nodo
+    :param node_indexes: lista de los nodos del grafo
+    :return: conjunto solucion de la hormiga
     """
-    sum_trail_heuristic = sum(
-        [pow(pheromone_trail[u[0]], alpha) * pow(u[1], beta) for u in complement_Sk])
-    return pow(pheromone_trail[v_heuristic[0]], alpha) * pow(v_heuristic[1], beta) / sum_trail_heuristic
+    # Punto de partida random siendo Sk la solucion encontrada por esta hormiga
+    v = node_indexes[randrange(len(node_indexes))]
+    Sk = {v}
+
+    # Queremos todos los nodos que no esten en el Sk considerado ni sean vecinos del mismo
+    complement_Sk = np.zeros(len(weights), dtype=bool)
+    complement_Sk[node_indexes] = True
+    complement_Sk[v] = False
+    complement_Sk[neighbors[v]] = False
+    complement_weights = np.where(complement_Sk, weights, 0.0)
+
+    # Mientras hayan vertices que no sean vecinos de los que estan en Sk
+    while True:
+        cumulative = np.cumsum(complement_weights)
+        if cumulative[-1] > 0:
+            # Elegimos uno con probabilidad proporcional a su peso
+            v = int(np.searchsorted(cumulative, random() * cumulative[-1], side="right"))
+        else:
+            # Solo quedan nodos con peso 0 (o ninguno), se elige uno al azar
+            remaining = np.flatnonzero(complement_Sk)
+            if len(remaining) == 0:
+                break
+            v = int(remaining[randrange(len(remaining))])
+
+        # Actualizamos el complemento y el Sk
+        Sk.add(v)
+        complement_Sk[v] = False
+        complement_Sk[neighbors[v]] = False
+        complement_weights[v] = 0
+        complement_weights[neighbors[v]] = 0
+    return Sk
 
 
 def update_pheromones(solutions, node_indexes, pheromone_trail, p, Q):
@@ -58,15 +148,63 @@ def update_pheromones(solutions, node_indexes, pheromone_trail, p, Q):
     :param Q: valor por el que multiplicar el tamano del conjunto actual para actualizar la feromona si el nodo esta en el conjunto.
     :param p: Tasa de evaporacion de la feromona. Debe estar entre 0 y 1
     """
-    for node in node_indexes:
-        pheromone_trail[node] = (1 - p) * pheromone_trail[node]
-        
-        for Sk in solutions:
-            if node in Sk:
-                pheromone_trail[node] += Q * len(Sk)
+    # Cada hormiga deposita Q * |Sk| en cada nodo de su solucion; los depositos se suman con bincount
+    deposit = np.zeros(len(pheromone_trail))
+    if solutions:
+        nodes = np.concatenate([np.fromiter(Sk, dtype=np.int64, count=len(Sk)) for Sk in solutions])
+        amounts = np.repeat([Q * len(Sk) for Sk in solutions], [len(Sk) for Sk in solutions])
+        deposit = np.bincount(nodes, weights=amounts, minlength=len(pheromone_trail))
+    pheromone_trail[node_indexes] = (1 - p) * pheromone_trail[node_indexes] + deposit[node_indexes]
+
+
+def init_colony_worker(memory_name, size, node_indexes):
+    """
+    Inicializa un proceso de la colonia paralela: se conecta a la memoria compartida con la adyacencia CSR
+    (indptr seguido de indices) y arma los arreglos de vecinos como vistas sobre ella, sin copiarla
+
+    :param memory_name: nombre del bloque de memoria compartida
+    :param size: cantidad de nodos (indptr tiene size + 1 elementos)
+    :param node_indexes: lista de los nodos del grafo
+    """
+    global colony_memory, colony_neighbors, colony_node_indexes
+    colony_memory = shared_memory.SharedMemory(name=memory_name)
+    data = np.ndarray(colony_memory.size // 8, dtype=np.int64, buffer=colony_memory.buf)
+    indptr = data[:size + 1]
+    colony_neighbors = np.split(data[size + 1:size + 1 + indptr[-1]], indptr[1:-1])
+    colony_node_indexes = node_indexes
+
+
+def colony_ants(task):
+    """
+    Construye las soluciones de un grupo de hormigas en un proceso de la colonia paralela
+
+    :param task: pesos de seleccion de la iteracion, cantidad de hormigas y semilla aleatoria
+    :return: lista con la solucion de cada hormiga
+    """
+    weights, number_of_ants, ant_seed = task
+    seed(ant_seed)
+    return [sorted(ant_solution(colony_neighbors, weights, colony_node_indexes)) for _ in range(number_of_ants)]
 
 
-def MIS_ACO(G, max_iter=10, number_of_ants=10, alpha=0.5, beta=0.5, p=0.8, Q=0.05, initial_pheromone=1.0):
+def start_colony(G, node_indexes, workers):
+    """
+    Crea los procesos de la colonia paralela y el bloque de memoria compartida con la adyacencia de G
+
+    :param G: grafo G
+    :param node_indexes: lista de los nodos del grafo
+    :param workers: cantidad de procesos
+    :return: pool de procesos y bloque de memoria compartida (hay que cerrarlo y liberarlo al terminar)
+    """
+    indptr, indices = csr_adjacency(G)
+    data = np.concatenate((indptr, indices))
+    memory = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 8))
+    np.ndarray(len(data), dtype=np.int64, buffer=memory.buf)[:] = data
+    pool = multiprocessing.Pool(workers, initializer=init_colony_worker,
+                                initargs=(memory.name, len(indptr) - 1, node_indexes))
+    return pool, memory
+
+
+def MIS_ACO(G, max_iter=10, number_of_ants=10, alpha=0.5, beta=0.5, p=0.8, Q=0.05, initial_pheromone=1.0, workers=1):
     """
     Optimizacion de colonia de hormigas para encontrar el conjunto maximo independiente de un grafo G.
 
@@ -78,67 +216,60 @@ def MIS_ACO(G, max_iter=10, number_of_ants=10, alpha=0.5, beta=0.5, p=0.8, Q=0.0
     :param Q: valor por el que multiplicar el tamano del conjunto actual para actualizar la feromona si el nodo esta en el conjunto.
     :param p: Tasa de evaporacion de la feromona. Debe estar entre 0 y 1
     :param initial_pheromone: valor inicial de la feromona.
+    :param workers: cantidad de procesos que construyen las soluciones de las hormigas en paralelo
     :return: indices del grafo que conforman un conjunto independiente maximo
     """
+    G = mis_graph(G)
     node_indexes = list(G.node_indexes())
+    neighbors = neighbor_arrays(G)
     # Rastro de la feromona
-    pheromone_trail = [initial_pheromone for _ in range(G.num_nodes())]
+    pheromone_trail = np.full(len(neighbors), initial_pheromone)
+
+    # La heuristica solo depende del grafo
+    heuristic_values = heuristic_table(G)
 
     S = set()
-    _G = G.copy()
-
-    # Criterio de parada
-    for _ in range(max_iter):
-        
-        solutions = []
-
-        # Por cada hormiga
-        for k in range(number_of_ants):
-
-            # Punto de partida random siendo Sk la solucion encontrada por esta hormiga
-            Sk = set()
-            v = choice(node_indexes)
-            Sk.add(v)
-
-            # Queremos todos los nodos que no esten en el Sk considerado ni sean vecinos del mismo
-            neighbors = list(_G.neighbors(v))
-            _G.remove_node(v)
-            _G.remove_nodes_from(neighbors)
-
-            # El complemento de la solucion hasta el momento son los vertices del grafo anterior
-            # (vertices que no esten en la solucion ni sean vecinos a los vertices en la misma), lo guardamos con
-            # su valor de la heuristica
-            complement_Sk = set()
-            _node_indexes = _G.node_indexes()
-            for n in _node_indexes:
-                complement_Sk.add((n, heuristic(_G, n)))
-
-            # Mientras hayan vertices que no sean vecinos de los que estan en Sk
-            while (len(complement_Sk) > 0):
-                list_complement_Sk = list(complement_Sk)
-                # Elegimos uno con cierta probabilidad
-                selected_v = list_complement_Sk[choice(len(list_complement_Sk), 1, [probability(
-                    complement_Sk, v, pheromone_trail, alpha, beta) for v in complement_Sk])[0]]
-
-                # Actualizamos el complemento y el Sk
-                complement_Sk.remove(selected_v)
-
-                selected_v_neighbors = _G.neighbors(selected_v[0])
-
-                _complement_Sk = complement_Sk.copy()
-                for n in _complement_Sk:
-                    if n[0] in selected_v_neighbors:
-                        complement_Sk.remove(n)
-
-                Sk.add(selected_v[0])
-
-            # Si el conjunto encontrado por la hormiga es mejor al que se tenia, actualizar.
-            if len(S) < len(Sk):
-                S = Sk.copy()
-                    
-            solutions.append(Sk)
-            _G = G.copy()
+
+    # Colonia paralela: la adyacencia va una sola vez a memoria compartida y en cada iteracion se envian
+    # los pesos a cada proceso. Un proceso daemon, como los de un multiprocessing.Pool (por ejemplo el de la
+    # descomposicion por componentes), no puede crear procesos; en ese caso la colonia corre en este proceso
+    pool = memory = None
+    if workers > 1 and not multiprocessing.current_process().daemon:
+        pool, memory = start_colony(G, node_indexes, workers)
+
+    try:
+        # Criterio de parada
+        for _ in range(max_iter):
+            if anytime.expired():
+                break
+
+            # Los pesos de seleccion no cambian durante una iteracion
+            weights = selection_weights(pheromone_trail, heuristic_values, alpha, beta)
+
+            if pool is not None:
+                ants = [len(part) for part in np.array_split(range(number_of_ants), workers) if len(part) > 0]
+                solutions = [set(Sk) for batch in pool.map(colony_ants, [(weights, n, getrandbits(32)) for n in ants])
+                             for Sk in batch]
+            else:
+                solutions = []
+                # Por cada hormiga
+                for k in range(number_of_ants):
+                    if anytime.expired():
+                        break
+                    solutions.append(ant_solution(neighbors, weights, node_indexes))
+
+            # Si el conjunto encontrado por alguna hormiga es mejor al que se tenia, actualizar.
+            for Sk in solutions:
+                if len(S) < len(Sk):
+                    S = Sk.copy()
+                    anytime.publish(S)
+
             # Actualizar la feromona
-        update_pheromones(solutions, node_indexes, pheromone_trail, p, Q)
+            update_pheromones(solutions, node_indexes, pheromone_trail, p, Q)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            memory.close()
+            memory.unlink()
 
     return list(S)
@@ -1,66 +1,220 @@
-from numpy.random import choice
+import multiprocessing
+from random import Random, getrandbits, shuffle, choice
 
-from .MIS_heuristic import MIS_heuristic
-from .MIS_local_search import MIS_local_search
+from .graph import mis_graph, ResidualGraph
+from .MIS_local_search import MIS_local_search, fill
+from .solution_state import SolutionState
+from . import anytime
 
+# Subgrafo de construccion de cada proceso del GRASP paralelo (ver init_grasp_worker)
+grasp_residual = None
 
-def greedy_solution(G, S, alpha=0.1):
+
+def greedy_solution(residual, alpha=0.1, rng=None):
     """
-    Funcion que retorna una solucion greedy para MIS basandose en un RCL, anadiendo un vertice cada vez
+    Funcion que construye una solucion greedy aleatorizada para MIS basandose en un RCL, anadiendo un vertice cada vez.
+    Los vertices libres (ni en la solucion ni vecinos de ella) son los del subgrafo, que se achica al elegir cada
+    vertice, y se guardan en buckets por su grado en el subgrafo, por lo que la construccion completa cuesta
+    O(n + m). Al terminar se restaura el subgrafo, para reutilizarlo en la siguiente construccion.
 
-    :pram G: grafo del que se quiere obtener solucion
-    :param S: solucion 
+    :param residual: subgrafo (ver ResidualGraph)
     :param alpha: parámetro candidato restringido. alpha > 0
-    :return: un posible conjunto independiente
+    :param rng: generador aleatorio (random.Random) de la construccion, por defecto uno nuevo
+    :return: indices del grafo que conforman un conjunto independiente maximal
+    """
+    rng = rng or Random()
+    adj, degree = residual.adj, residual.degree
+    nodes = residual.nodes()
+    mark = residual.mark()
+
+    # Cada vertice libre esta en el bucket de su grado y recuerda su posicion en el, para sacarlo en O(1).
+    # Los vertices que no estan en ningun bucket tienen posicion -1
+    buckets = [[] for _ in range(max((degree[v] for v in nodes), default=0) + 1)]
+    position = [-1] * len(adj)
+    for v in nodes:
+        position[v] = len(buckets[degree[v]])
+        buckets[degree[v]].append(v)
+
+    S = []
+    min_degree = 0
+    while len(residual) > 0:
+        while not buckets[min_degree]:
+            min_degree += 1
+
+        # RCL = (v libre | dv < (1 + alpha) * min_degree o dv == 0), son los buckets desde min_degree hasta limit.
+        # Se elige un vertice al azar entre todos ellos
+        limit = min_degree
+        while limit + 1 < len(buckets) and limit + 1 < (1 + alpha) * min_degree:
+            limit += 1
+        r = rng.randrange(sum(len(buckets[d]) for d in range(min_degree, limit + 1)))
+        d = min_degree
+        while r >= len(buckets[d]):
+            r -= len(buckets[d])
+            d += 1
+        v = buckets[d][r]
+
+        # Se incluye v en la solucion. El y sus vecinos dejan de estar libres
+        S.append(v)
+        removed = residual.neighbors(v)
+        for u in [v] + removed:
+            bucket = buckets[degree[u]]
+            last = bucket.pop()
+            if last != u:
+                bucket[position[u]] = last
+                position[last] = position[u]
+            position[u] = -1
+
+        # Los vecinos libres de los vertices que salieron bajan de grado
+        residual.remove(v)
+        for u in removed:
+            residual.remove(u)
+            for w in adj[u]:
+                if position[w] >= 0:
+                    bucket = buckets[degree[w] + 1]
+                    last = bucket.pop()
+                    if last != w:
+                        bucket[position[w]] = last
+                        position[last] = position[w]
+                    position[w] = len(buckets[degree[w]])
+                    buckets[degree[w]].append(w)
+                    if degree[w] < min_degree:
+                        min_degree = degree[w]
+
+    residual.restore(mark)
+    return S
+
+
+def grasp_iteration(residual, alpha, iteration_seed):
+    """
+    Funcion que ejecuta una iteracion de GRASP: una construccion aleatorizada seguida de busqueda local
+
+    :param residual: subgrafo sobre el que se construye (ver ResidualGraph)
+    :param alpha: parámetro candidato restringido. alpha > 0
+    :param iteration_seed: semilla aleatoria de la iteracion
+    :return: indices del grafo que conforman un conjunto independiente maximal
+    """
+    # Generador propio de la iteracion, para no alterar el estado global de random
+    S = greedy_solution(residual, alpha, Random(iteration_seed))
+    return MIS_local_search(residual.graph, S, len(S) - 1)
+
+
+def init_grasp_worker(G):
+    """
+    Inicializa un proceso del GRASP paralelo creando su subgrafo de construccion, que se reutiliza en
+    todas las iteraciones del proceso
+
+    :param G: grafo G
+    """
+    global grasp_residual
+    grasp_residual = ResidualGraph(G)
+
+
+def grasp_task(task):
+    """
+    Ejecuta una iteracion de GRASP en un proceso del GRASP paralelo (ver grasp_iteration)
+
+    :param task: alpha y semilla aleatoria de la iteracion
+    :return: solucion de la iteracion, o lista vacia si ya paso el tiempo limite
     """
-    _S = S.copy()
-    _G = G.copy()
-    
-    # Obtenemos los nodos del grafo y sus vecinos
-    nodes = []
-    node_indexes = G.node_indexes()
-                    
-    if (len(node_indexes) > 0):
-        for node in node_indexes:
-            neighbors = list(_G.neighbors(node))
-            nodes.append({"index": node, "neighbors": neighbors, "degree": len(neighbors)})
-
-        # Obtenemos el menor grado entre los vertices
-        min_degree = min(nodes, key=lambda n: n["degree"])["degree"]
-
-        # Construimos una solucion greedy con RCL = (v in Vk | dv < (1 + alpha) * P or dv == 0) donde
-        # min_degree es el grado mas pequeno de vertices en Vk distinto a 0 
-        RCL = [node_data for node_data in nodes if node_data["degree"] < ((1 + alpha) * min_degree) or node_data["degree"] == 0]
-
-        # Elegimos un vertice al azar y lo incluimos en la solucion
-        v = choice(RCL)
-        _S.add(v["index"])
-
-        # Inducimos un grafo del vertice elegido
-        for u in v["neighbors"]:
-            _G.remove_node(u)
-            if u in _S:
-                _S.discard(u)
-        _G.remove_node(v["index"])
-    return _S, _G
-
-
-def MIS_GRASP(G, max_iter=10, alpha=0.1):
+    if anytime.expired():
+        return []
+    return grasp_iteration(grasp_residual, *task)
+
+
+def path_relinking(G, S, T):
     """
-    GRASP para encontrar el conjunto maximo independiente de un grafo G haciendo busqueda local de k-exchanges con 
-    k = len(S) - 1 para un S obtenido con el RCL.
+    Funcion que recorre un camino desde la solucion S hacia la solucion T: en orden aleatorio se agrega cada vertice
+    de T que no esta en S, sacando sus vecinos en S y completando con los vertices que quedan libres
 
     :param G: grafo G
-    :param S: conjunto independiente de G
+    :param S: solucion inicial
+    :param T: solucion guia
+    :return: mejor solucion intermedia del camino (sin contar sus extremos), o None si no hay
+    """
+    state = SolutionState(G, S)
+    moves = [v for v in T if v not in state.S]
+    shuffle(moves)
+
+    best = None
+    for v in moves[:-1]:
+        # fill puede haber agregado v en un paso anterior
+        if v in state.S:
+            continue
+        for u in [u for u in state.adj[v] if state.in_S[u]]:
+            state.remove(u)
+        state.add(v)
+        fill(state)
+        if best is None or len(state.S) > len(best):
+            best = list(state.S)
+    return best
+
+
+def update_elite(elite, S, elite_size):
+    """
+    Funcion que agrega una solucion al conjunto elite si no esta y, si el conjunto esta lleno, es mejor que la peor
+
+    :param elite: lista de soluciones elite (conjuntos)
+    :param S: solucion
+    :param elite_size: tamaño maximo del conjunto elite
+    """
+    S = set(S)
+    if S in elite:
+        return
+    if len(elite) < elite_size:
+        elite.append(S)
+        return
+    worst = min(range(len(elite)), key=lambda i: len(elite[i]))
+    if len(elite[worst]) < len(S):
+        elite[worst] = S
+
+
+def MIS_GRASP(G, max_iter=10, alpha=0.1, workers=1, elite_size=0):
+    """
+    GRASP para encontrar el conjunto maximo independiente de un grafo G. Cada iteracion construye una solucion
+    desde cero con el RCL y la mejora con busqueda local de k-exchanges con k = len(S) - 1. Las iteraciones son
+    independientes, por lo que se pueden repartir entre varios procesos. Opcionalmente cada solucion se re-enlaza
+    (path relinking) con una solucion al azar de un conjunto elite de las mejores soluciones encontradas.
+
+    :param G: grafo G
+    :param max_iter: numero de iteraciones
     :param alpha: parámetro candidato restringido. alpha > 0
+    :param workers: cantidad de procesos que ejecutan las iteraciones en paralelo
+    :param elite_size: tamaño del conjunto elite para path relinking, 0 para no hacer path relinking
     :return: indices del grafo que conforman un conjunto independiente maximo
-    """ 
-    S = set()
-    _G = G.copy()
-    for _ in range(max_iter):
-        S, _G = greedy_solution(_G, S, alpha)
-        _S = set(MIS_local_search(G, S, len(S) - 1))
-
-        if len(S) < len(_S):
-            S = _S.copy()
-    return list(S)
+    """
+    G = mis_graph(G)
+    tasks = [(alpha, getrandbits(32)) for _ in range(max_iter)]
+
+    # Un proceso daemon, como los de un multiprocessing.Pool (por ejemplo el de la descomposicion por
+    # componentes), no puede crear procesos; en ese caso las iteraciones corren en este proceso
+    pool = None
+    if workers > 1 and not multiprocessing.current_process().daemon:
+        pool = multiprocessing.Pool(workers, initializer=init_grasp_worker, initargs=(G,))
+        solutions = pool.imap_unordered(grasp_task, tasks)
+    else:
+        residual = ResidualGraph(G)
+        solutions = (grasp_iteration(residual, *task) for task in tasks if not anytime.expired())
+
+    S = []
+    elite = []
+    try:
+        for _S in solutions:
+            candidates = [_S]
+            if elite_size > 0 and _S:
+                if elite:
+                    relinked = path_relinking(G, _S, choice(elite))
+                    if relinked is not None:
+                        candidates.append(MIS_local_search(G, relinked, len(relinked) - 1))
+                for C in candidates:
+                    update_elite(elite, C, elite_size)
+
+            for C in candidates:
+                if len(S) < len(C):
+                    S = list(C)
+                    anytime.publish(S)
+            if anytime.expired():
+                break
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return S
@@ -2,10 +2,14 @@ from operator import itemgetter
 from numpy.random import choice
 from heapq import nlargest
 from random import randrange
+import numpy as np
 import rustworkx as rx
 
 from .MIS_local_search import MIS_local_search
 from .MIS_heuristic import MIS_heuristic
+from .solution_state import SolutionState
+from .graph import mis_graph, two_hop_neighbors
+from . import anytime
 
 
 def force(G, S, k, history, itr):
@@ -17,62 +21,53 @@ def force(G, S, k, history, itr):
     :param S: solucion actual
     :return: solucion perturbada
     """ 
-    _G = G.copy()
-    _S = S.copy()
-    
-    for v in S:
-        # Grafo con vertices que no formen parte de la solucion actual
-        _G.remove_node(v)
-    node_indexes = list(_G.node_indexes())
+    state = SolutionState(G, S)
     
     if k == 1:
         
-        chosen_v = choice(node_indexes)
+        # Vertices que no forman parte de la solucion actual
+        node_indexes = [v for Vk in state.V for v in Vk]
+        chosen_v = node_indexes[randrange(len(node_indexes))]
         history[chosen_v] = itr
         
         # Borramos de la solucion los vecinos del elegido
-        chosen_v_neighbors = G.neighbors(chosen_v)
-        for s in S:
-            if s in chosen_v_neighbors:
-                _S.discard(s)
-        _S.add(chosen_v)
+        for s in state.solution_neighbors(chosen_v):
+            state.remove(s)
+        state.add(chosen_v)
     else:
         
-        possible_k = []
-        
-        for v in node_indexes:
-            for s in S:
-                if v in G.neighbors(s):
-                    possible_k.append(v)
+        # Vertices con al menos un vecino en S, cada uno con peso igual a su numero de vecinos en S
+        possible_k = [v for Vk in state.V[1:] for v in Vk]
+        weights = np.array([state.tightness[v] for v in possible_k], dtype=float)
         
         # Seleccionamos 4 vertices de entre los que tienen al menos un vecino en S
-        possible_k = choice(possible_k, 4)
+        possible_k = choice(possible_k, 4, p=weights / weights.sum())
                 
         # Elegimos a alguno de los que lleven menos iteraciones desde que estuvieron en S (si estuvieron alguna vez)
-        last_itr_possible_k = {v: history.get(v, 0) for v in possible_k}
+        last_itr_possible_k = {int(v): history.get(v, 0) for v in possible_k}
         chosen_v = min(last_itr_possible_k, key=last_itr_possible_k.get)
                 
         # Queremos incluir tambien aquellos que esten a distancia dos (2) del vertice elegido y no esten en S
-        distances_from_chosen_v = rx.distance_matrix(G)[chosen_v]
-        distance_2_from_chosen_v = [u for u, d in enumerate(distances_from_chosen_v) if d == 2 and u not in S]
+        distance_2_from_chosen_v = two_hop_neighbors(G, chosen_v)
+        in_S = np.frombuffer(state.in_S, dtype=bool)
+        distance_2_from_chosen_v = distance_2_from_chosen_v[~in_S[distance_2_from_chosen_v]]
         
         # Elegimos k - 1 vertices de los que esten a dos de distancia del primer vertice elegido (hay al menos un vertice que impide que sean vecinos), si lo hay
         # Si no hay suficientes vertices para sumar k - 1, entonces solo aquellos que cumplan incluso si son menos.
         chosen = set()
         if len(distance_2_from_chosen_v) > 0:
-            chosen = set(choice(distance_2_from_chosen_v, k - 1))
+            chosen = set(int(v) for v in choice(distance_2_from_chosen_v, k - 1))
         chosen.add(chosen_v)
         
         # Borramos de la solucion los vecinos de los elegidos
         for v in chosen:
-            for s in S:
-                if s in G.neighbors(v):
-                    _S.discard(s)
-            _S.add(v)
+            if v not in state:
+                for s in state.solution_neighbors(v):
+                    state.remove(s)
+                state.add(v)
             history[v] = itr
-            S = _S.copy()
 
-    return _S
+    return state.solution()
 
 
 def acceptanceCondition(S, _S, i, itr):
@@ -109,6 +104,7 @@ def MIS_ILS(G, max_iter=None):
     :param max_iter: numero maximo de iteraciones a ejecutar
     :return: indices del grafo que conforman un conjunto independiente maximo
     """ 
+    G = mis_graph(G)
     num_edges = G.num_edges()
 
     # Solucion inicial
@@ -116,6 +112,7 @@ def MIS_ILS(G, max_iter=None):
 
     # Mejor solucion actual
     S = set(MIS_local_search(G, S0, len(S0) - 1))
+    anytime.publish(S)
     
     # Solucion al momento 
     _S = S.copy()
@@ -131,7 +128,7 @@ def MIS_ILS(G, max_iter=None):
     
     # El criterio de parada es un numero maximo de iteraciones definidos o, en su lugar, la cantidad de
     # arcos del grafo
-    while itr < (max_iter if max_iter is not None else num_edges):
+    while itr < (max_iter if max_iter is not None else num_edges) and not anytime.expired():
         # Elegimos un k para la perturbacion tal que si estamos en la primera iteracion
         # k = 1 siempre y, si no, con una probabilidad pequena de 1 / (2 * len(S)) elegimos un k mayor a 1.
         # La mayor parte del tiempo k == 1
@@ -145,6 +142,7 @@ def MIS_ILS(G, max_iter=None):
 
         # Definimos si el resultado de la perturbacion es aceptado como nuevo maximum independent set
         S, i = acceptanceCondition(S, _S, i, itr)
+        anytime.publish(S)
         itr += 1
     return list(S)
 
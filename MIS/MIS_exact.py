@@ -1,33 +1,149 @@
 import rustworkx as rx
 
+from .graph import mis_graph
+from .reduce import bits, to_bitsets, MIS_reduced
+from . import anytime
+
+
+def greedy_lower_bound(adj, alive):
+    """
+    Funcion que construye un conjunto independiente con el greedy de menor grado, como cota inferior inicial
+
+    :param adj: lista de bitsets de adyacencia
+    :param alive: bitset de los nodos considerados
+    :return: lista de nodos del conjunto independiente
+    """
+    S = []
+    while alive:
+        v = min(bits(alive), key=lambda u: (adj[u] & alive).bit_count())
+        S.append(v)
+        alive &= ~(adj[v] | (1 << v))
+    return S
+
+
+def color_sort(P, cadj, kmin):
+    """
+    Funcion que colorea de forma greedy los candidatos P en el grafo complemento (estilo MCQ/MCS de Tomita).
+    Cada color es un conjunto independiente en el complemento, es decir, un clique en G, por lo que un MIS
+    contiene a lo sumo un nodo de cada color.
+
+    :param P: bitset de candidatos
+    :param cadj: lista de bitsets de adyacencia del complemento
+    :param kmin: nodos con color menor o igual a kmin no pueden mejorar la solucion y no se retornan
+    :return: nodos de P con color mayor a kmin ordenados por color y el color de cada uno
+    """
+    classes = []
+    U = P
+    while U:
+        Q = U
+        color_class = 0
+        while Q:
+            low = Q & -Q
+            v = low.bit_length() - 1
+            U ^= low
+            Q ^= low
+            Q &= ~cadj[v]
+            color_class |= low
+        classes.append(color_class)
+
+    kmin = max(kmin, 0)
+    order = []
+    colors = []
+    color = kmin
+    for color_class in classes[kmin:]:
+        if color_class:
+            color += 1
+            for v in bits(color_class):
+                order.append(v)
+                colors.append(color)
+    return order, colors
+
+
+def branch_and_bound(G):
+    """
+    Branch and bound sobre bitsets para encontrar el conjunto maximo independiente de un grafo G, buscando un
+    clique maximo en el complemento y acotando con coloreo greedy.
+
+    :param G: grafo G
+    :return: indices del grafo que conforman un conjunto independiente maximo
+    """
+    G = mis_graph(G)
+    nodes, adj = to_bitsets(G)
+    alive = (1 << len(nodes)) - 1
+
+    # Renumeramos los nodos con un orden de degeneracion del complemento: se saca repetidamente
+    # el nodo de mayor grado en G (menor grado en el complemento) y se coloca al final. Asi los primeros bits,
+    # que el coloreo procesa primero, son los nodos mas restringidos
+    remaining = []
+    left = alive
+    while left:
+        v = max(bits(left), key=lambda u: (adj[u] & left).bit_count())
+        remaining.append(v)
+        left &= ~(1 << v)
+    remaining.reverse()
+    k = len(remaining)
+    position = {v: i for i, v in enumerate(remaining)}
+    full = (1 << k) - 1
+    cadj = []
+    for v in remaining:
+        neighbors = 0
+        for u in bits(adj[v] & alive):
+            neighbors |= 1 << position[u]
+        cadj.append(full & ~neighbors & ~(1 << position[v]))
+
+    def solution(clique):
+        return sorted(nodes[remaining[i]] for i in clique)
+
+    best = [position[v] for v in greedy_lower_bound(adj, alive)]
+    anytime.publish(solution(best))
+    C = []
+
+    def frame(P):
+        # Nivel de la busqueda: candidatos ordenados por color, indice del siguiente a probar y candidatos restantes
+        order, colors = color_sort(P, cadj, len(best) - len(C))
+        return [order, colors, len(order) - 1, P]
+
+    def skip(level):
+        # El ultimo nodo agregado a C ya se exploro: se saca y deja de ser candidato en su nivel
+        v = C.pop()
+        level[3] &= ~(1 << v)
+        level[2] -= 1
+
+    # La busqueda usa una pila explicita en lugar de recursion, con un nivel por nodo de C: un conjunto
+    # independiente de miles de nodos superaria el limite de recursion de Python
+    stack = [frame(full)] if full else []
+    while stack:
+        level = stack[-1]
+        order, colors, i, P = level
+        # Poda: ni tomando un nodo de cada color se supera la mejor solucion (o no quedan candidatos)
+        if i < 0 or len(C) + colors[i] <= len(best):
+            stack.pop()
+            if stack:
+                skip(stack[-1])
+            continue
+        # Sin tiempo se abandona la busqueda, el resultado es la mejor solucion encontrada
+        if anytime.expired():
+            break
+        v = order[i]
+        C.append(v)
+        new_P = P & cadj[v]
+        if new_P:
+            stack.append(frame(new_P))
+            continue
+        if len(C) > len(best):
+            best = C.copy()
+            anytime.publish(solution(best))
+        skip(level)
+
+    return solution(best)
+
+
 def MIS_exact(G):
     """
-    Solucion exacta para encontrar el conjunto maximo independiente de un grafo G.
+    Solucion exacta para encontrar el conjunto maximo independiente de un grafo G. Se reduce el grafo (ver
+    reduce.kernelize) y luego se hace branch and bound sobre el kernel (ver branch_and_bound).
 
     :param G: grafo G
     :return: indices del grafo que conforman un conjunto independiente maximo
-    """ 
-    node_indexes = list(G.node_indices())
-    
-    # Caso Base: Si solo hay un nodo, ese es el conjunto maximo independiente. Si no hay nodos, es trivial.
-    if G.num_nodes() <= 1:
-        return node_indexes
-
-    v = node_indexes[0]
-    v_neighbors = list(G.neighbors(v))
-
-    # Caso 1: v pertenece al conjunto maximo independiente. Sus vecinos no.
-    _G = G.copy()
-    v_neighbors.append(v)
-    _G.remove_nodes_from(list(v_neighbors))
-    v_inc = [v] + MIS_exact(_G)
-
-    # Caso 2: v no pertenece al conjunto maximo independiente. Sus vecinos puede que si.
-    _G = G.copy()
-    _G.remove_node(v)
-    v_exc = MIS_exact(_G)
-
-    if len(v_inc) > len(v_exc):
-        return v_inc
-    else:
-        return v_exc
+    """
+    return MIS_reduced(G, branch_and_bound)
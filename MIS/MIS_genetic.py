@@ -1,139 +1,167 @@
 
-from random import randint, choice, sample
+import numpy as np
 import rustworkx as rx
+import multiprocessing
 from math import inf
 
 from .MIS_heuristic import MIS_heuristic2
+from .population import init_population, mutate, mix_cross, random_pairs, sort_population, repair_population, cardinality, decode
+from .graph import mis_graph
+from . import anytime
 
+# Grafo de cada proceso del modelo de islas (ver init_island_worker)
+island_graph = None
 
-def is_MIS(G, S):
-    """
-    Funcion que recibe un grafo G y un conjunto S de indices de nodos y determina si S es un conjunto independiente maximal
-
-    :param G: grafo dado
-    :param S: posible conjunto independiente maximal de G
-    :return: true si S es MIS para G, false si no
-    """ 
-    for i in range(len(S)):
-        if S[i] == True and any((S[n] == True) for n in G.neighbors(i)): return False
-        if S[i] == False and all((S[n] == False) for n in G.neighbors(i)): return False
-    return True
 
-
-def fitness(G, S):
+def next_generation(G, pop, fit, pop_size, mutation_rate, rng=None):
     """
-    Funcion que calcula la aptitud de un genotipo como conjunto independiente
+    Funcion que avanza una generacion: sobrevive la mitad con mejor aptitud y se completa la poblacion con hijos.
+    Los hijos se generan todos juntos: cada uno cruza dos padres distintos, muta y se repara
 
-    :param G: Grafo sobre el cual calcular la aptitud
-    :param S: genotipo cuya aptitud es calculada
-    :return f: aptitud del genotipo como conjunto independiente
-    """ 
-    f = 0
-    for i in range(len(S)):
-        if S[i] == True: 
-            f += 1 - sum(1 for n in G.neighbors(i) if (S[n] == True)  )
-        else:
-            f -= all((S[n] == False)  for n in G.neighbors(i) )
-    return f
-
-def add_cross(S1, S2):
+    :param G: grafo sobre el que ejecutar el algoritmo
+    :param pop: poblacion
+    :param fit: aptitud de cada genotipo
+    :param pop_size: tamaño de la población
+    :param mutation_rate: tasa de mutacion en milesimas de porcentaje
+    :param rng: generador aleatorio de NumPy (ver population.generator)
+    :return: nueva poblacion y su aptitud
     """
-    Funcion que cruza dos genotipos agregando rodos los nodos de ambos en el genotipo resultante
+    pop, fit = sort_population(pop, fit)
+    pop, fit = pop[int(len(pop)/2):], fit[int(len(pop)/2):]
 
-    :param S1: padre 1
-    :param S2: padre 2
-    :return: genotipo resultante del cruce
-    """ 
-    return [S1[i] or S2[i] for i in range(len(S1))]
+    p1, p2 = random_pairs(len(pop), pop_size - len(pop), rng)
+    children = repair_population(G, mutate(mix_cross(pop[p1], pop[p2], rng), mutation_rate, rng))
+    return np.vstack((pop, children)), np.concatenate((fit, cardinality(children)))
 
-def mix_cross(S1, S2):
-    """
-    Funcion que cruza dos genotipos escogiendo aleatoriamente nodos de cada uno
 
-    :param S1: padre 1
-    :param S2: padre 2
-    :return: genotipo resultante del cruce
-    """ 
-    return [choice([S1[i],S2[i]]) for i in range(len(S1))]
+def evolve_island(G, task):
+    """
+    Funcion que evoluciona la poblacion de una isla durante varias generaciones
 
-def mutate(S, mutation_rate):
+    :param G: grafo sobre el que ejecutar el algoritmo
+    :param task: poblacion, aptitudes, tamaño de la población, tasa de mutacion, generaciones y semilla aleatoria
+    :return: poblacion y aptitudes finales, mejor aptitud de cada generacion y mejor individuo [genotipo, aptitud]
+    """
+    pop, fit, pop_size, mutation_rate, generations, island_seed = task
+    # Generador propio de la isla, para no alterar el estado global de np.random
+    rng = np.random.default_rng(island_seed)
+    i = int(np.argmax(fit))
+    best = [pop[i].copy(), int(fit[i])]
+    history = []
+    for _ in range(generations):
+        if anytime.expired():
+            break
+        pop, fit = next_generation(G, pop, fit, pop_size, mutation_rate, rng)
+        i = int(np.argmax(fit))
+        history.append(int(fit[i]))
+        if fit[i] > best[1]:
+            best = [pop[i].copy(), int(fit[i])]
+    return pop, fit, history, best
+
+
+def init_island_worker(G):
     """
-    Funcion que genera una mutacion de un genotipo en base a una tasa de mutacion
+    Inicializa un proceso del modelo de islas guardando el grafo
 
-    :param S: genotipo a mutar
-    :param mutation_rate: tasa de mutacion, cada unidad representa un 0.1 de probabilidad de mutacion
-    :return: genotipo resultante de la mutacion
-    """ 
-    return [i != (randint(0,1000) < mutation_rate) for i in S]
+    :param G: grafo sobre el que ejecutar el algoritmo
+    """
+    global island_graph
+    island_graph = G
 
 
-def init_population(n_nodes, pop_size, initial_set_size):
+def island_task(task):
+    """
+    Evoluciona una isla en un proceso del modelo de islas (ver evolve_island)
     """
-    Funcion que genera una poblacion inicial de genotipos de tamaño especificado donde el conjunto 
-    que representa cada genotipo tambien tiene un tamaño especificado
+    return evolve_island(island_graph, task)
 
-    :param n_nodes: numero de nodos del grafo
-    :param pop_size: tamaño de la población
-    :param initial_set_size: tamaño del conjunto representado por los genotipos generados
-    :return pop: poblacion generada
-    """ 
-    pop = []
-    for i in range(pop_size):
-        p = [False for e in range(n_nodes)]
-        for i in range(initial_set_size):
-            p[randint(0,n_nodes-1)] = True
-        pop.append([p, None])
-    return pop
-
-def MIS_genetic(G, pop_size, mutation_rate, max_no_improvement):
+
+def MIS_genetic(G, pop_size, mutation_rate, max_no_improvement, islands=1, migration_interval=10, topology="ring", workers=None):
     """
-    Funcion que ejecuta un algoritmo genetico sobre un grafo para encontrar un conjunto independiente maximo
+    Funcion que ejecuta un algoritmo genetico sobre un grafo para encontrar un conjunto independiente maximo.
+    Con islands > 1 se usa un modelo de islas: cada isla evoluciona su propia poblacion en un proceso y cada
+    migration_interval generaciones cada isla recibe el mejor individuo de otra, que reemplaza a su peor individuo.
+    El criterio de parada (max_no_improvement) se aplica a la mejor solucion global. Todos los genotipos se reparan
+    (ver population.repair), por lo que son conjuntos independientes maximales y su aptitud es su tamaño.
 
     :param G: grafo sobre el que ejecutar el algoritmo
-    :param pop_size: tamaño de la población
+    :param pop_size: tamaño de la población (de cada isla)
     :param mutation_rate: tasa de mutacion en milesimas de porcentaje
     :param max_no_improvement: maximo numero admisible de iteraciones sin mejora
-    :return pop: conjunto independiente maximal encontrado, o conjunto encontrado si 
-    se excede el numero admisible de iteraciones sin mejora
+    :param islands: cantidad de islas
+    :param migration_interval: cada cuantas generaciones migran los mejores individuos entre islas
+    :param topology: "ring" (la isla i recibe de la isla i - 1) o "random" (cada isla recibe de otra al azar)
+    :param workers: cantidad de procesos, por defecto uno por isla hasta la cantidad de CPUs
+    :return pop: mayor conjunto independiente maximal encontrado
     """ 
-
-    pop = init_population(len(G.node_indices()), pop_size, len(MIS_heuristic2(G)))
-
-    best = [[],-inf]
+    G = mis_graph(G)
+
+    estimate = len(MIS_heuristic2(G))
+    populations = []
+    for _ in range(islands):
+        pop = repair_population(G, init_population(len(G.active), pop_size, estimate))
+        populations.append((pop, cardinality(pop)))
+
+    # Con una sola isla se revisa el criterio de parada en cada generacion, como en el algoritmo original
+    generations = migration_interval if islands > 1 else 1
+
+    # Las islas corren en procesos aparte si hay mas de una. Un proceso daemon, como los de un
+    # multiprocessing.Pool (por ejemplo el de la descomposicion por componentes), no puede crear procesos; en ese
+    # caso las islas se evolucionan una tras otra
+    pool = None
+    if islands > 1 and not multiprocessing.current_process().daemon:
+        workers = workers or min(islands, multiprocessing.cpu_count())
+        pool = multiprocessing.Pool(workers, initializer=init_island_worker, initargs=(G,))
+
+    best = [None, -inf]
     no_improvement = 0
-    mutation_factor = 10
-    I = 0
-    while True:
-        #I +=1
-
-        maxF = [[], -inf] 
-        for p in pop:
-            if p[1] == None: p[1] = fitness(G, p[0])
-            if p[1] > maxF[1]: 
-                maxF = p
-
-        if maxF[1] > best[1]:
-            best = maxF
-            no_improvement = 0
-            if is_MIS(G, best[0]): break 
-        else: 
-            no_improvement +=1
-            if no_improvement == max_no_improvement:
+    try:
+        # Generacion inicial: cada isla aporta su mejor individuo y su mejor aptitud
+        island_bests = []
+        for pop, fit in populations:
+            i = int(np.argmax(fit))
+            island_bests.append([pop[i].copy(), int(fit[i])])
+        history = [[island_best[1] for island_best in island_bests]]
+
+        while True:
+            # Se revisa el criterio de parada generacion por generacion con la mejor aptitud global
+            stop = False
+            best_fit = best[1]
+            for generation in history:
+                if max(generation) > best_fit:
+                    best_fit = max(generation)
+                    no_improvement = 0
+                else: 
+                    no_improvement +=1
+                    if no_improvement == max_no_improvement:
+                        stop = True
+
+            island_best = max(island_bests, key=lambda b: b[1])
+            if island_best[1] > best[1]:
+                best = island_best
+                anytime.publish(decode(best[0]), best[1])
+
+            if stop or anytime.expired():
                 break
 
-        #avg = sum(p[0].count(True) for p in pop)/len(pop)
-        #avgf = sum(p[1] for p in pop)/len(pop)
-        #print(I, "len", best[0].count(True), "score", best[1],"avgl", avg, "avgf", avgf, "maxF", maxF[1], "mut", mutation_rate+no_improvement/mutation_factor)
-        
-        pop.sort(key=lambda p: p[1])
-        pop = pop[int(len(pop)/2):]
-
-        children = []
-        for i in range(pop_size - len(pop)):
-            p1, p2 = sample(pop, 2)
-            child = mix_cross(p1[0],p2[0])
-            # sample(pop,1)[0][0]
-            child = mutate(child, mutation_rate)#+no_improvement/mutation_factor
-            children.append([child, None])
-        pop += children
-    return [i for i in range(len(best[0])) if best[0][i] == True]
+            tasks = [(pop, fit, pop_size, mutation_rate, generations, np.random.randint(2**32))
+                     for pop, fit in populations]
+            results = pool.map(island_task, tasks) if pool is not None else [evolve_island(G, t) for t in tasks]
+            populations = [(pop, fit) for pop, fit, _, _ in results]
+            island_bests = [island_best for _, _, _, island_best in results]
+            history = [list(generation) for generation in zip(*[h for _, _, h, _ in results])]
+
+            # Migracion: cada isla recibe el mejor individuo de otra isla, que reemplaza a su peor individuo
+            if islands > 1:
+                emigrants = [(pop[int(np.argmax(fit))].copy(), fit.max()) for pop, fit in populations]
+                for i, (pop, fit) in enumerate(populations):
+                    if topology == "ring":
+                        source = (i - 1) % islands
+                    else:
+                        source = (i + np.random.randint(1, islands)) % islands
+                    worst = int(np.argmin(fit))
+                    pop[worst], fit[worst] = emigrants[source]
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return decode(best[0])
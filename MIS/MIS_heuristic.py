@@ -1,63 +1,81 @@
 from random import randint
 import rustworkx as rx
 
+from .graph import mis_graph, adjacency_lists, degree_order, ResidualGraph
+
 def MIS_heuristic(G):
     """
     Solucion heuristica para encontrar el conjunto maximo independiente de un grafo G.
+    No modifica G: los nodos elegidos se marcan en un arreglo propio, por lo que el grafo se puede compartir.
 
     :param G: grafo G
     :return: indices del grafo que conforman un conjunto independiente maximal
     """ 
-
+    G = mis_graph(G)
+    adj = adjacency_lists(G)
+    selected = bytearray(len(adj))
     S = []
 
-    # ordenamos los nodos del grafo en orden de su cantidad de vecinos
-    nodes = []
-    for node in G.node_indices():
-        nodes.append({"index": node, "neighbors": G.neighbors(node)})
-    nodes.sort(key=lambda x: len(x["neighbors"]))
-
-    # se recorre la lista ordenada de nodos
+    # se recorren los nodos en orden de su cantidad de vecinos
     # y se agrega un nodo al conjunto si no es adyacente
     # a algun nodo que haya sido agregado previamente
-    for node in nodes:
-        valid = True
-        for neighbor in node["neighbors"]:
-            if G[neighbor] == 1:
-                valid = False
-                break
+    for v in degree_order(G).tolist():
+        if not any(selected[u] for u in adj[v]):
+            selected[v] = 1
+            S.append(v)
+
+    return S
 
-        if valid:
-            G[node["index"]] = 1
-            S.append(node["index"])
+def min_degree_greedy(residual):
+    """
+    Heuristica golosa de grado minimo sobre un subgrafo: agrega a S el nodo de menor grado y saca del subgrafo
+    a el y a sus vecinos, hasta que no quedan nodos. Los nodos se guardan en una cola de buckets por grado que
+    se actualiza al sacar cada nodo, por lo que cuesta O(n + m). Al terminar se restaura el subgrafo.
+
+    :param residual: subgrafo (ver ResidualGraph)
+    :return: indices del subgrafo que conforman un conjunto independiente maximal
+    """
+    adj, alive, degree = residual.adj, residual.alive, residual.degree
+    nodes = residual.nodes()
+    mark = residual.mark()
 
+    # Un nodo puede quedar en buckets de grados anteriores; una entrada es valida si sigue vivo y con ese grado.
+    # Se insertan en orden inverso para que, en empate, salga primero el de menor indice
+    buckets = [[] for _ in range(max((degree[v] for v in nodes), default=0) + 1)]
+    for v in reversed(nodes):
+        buckets[degree[v]].append(v)
+
+    S = []
+    d = 0
+    while len(residual) > 0:
+        while not buckets[d]:
+            d += 1
+        v = buckets[d].pop()
+        if not alive[v] or degree[v] != d:
+            continue
+
+        S.append(v)
+        removed = residual.neighbors(v)
+        residual.remove(v)
+        for u in removed:
+            residual.remove(u)
+            for w in adj[u]:
+                if alive[w]:
+                    buckets[degree[w]].append(w)
+                    if degree[w] < d:
+                        d = degree[w]
+
+    residual.restore(mark)
     return S
 
+
 def MIS_heuristic2(G):
     """
     Solucion heuristica para encontrar el conjunto maximo independiente de un grafo G.
+    Es la heuristica golosa de grado minimo (ver min_degree_greedy), recalculando los grados despues de cada paso.
 
     :param G: grafo G
     :return: indices del grafo que conforman un conjunto independiente maximal
     """ 
-
-    S = []
-    _G = G.copy()
-
-    while len(_G.node_indices()) > 0:
-
-
-        # ordenamos los nodos del grafo en orden de su cantidad de vecinos
-        nodes = []
-        for node in _G.node_indices():
-            nodes.append({"index": node, "neighbors": _G.neighbors(node)})
-        nodes.sort(key=lambda x: len(x["neighbors"]))
-
-        n = nodes[0]
-        S.append(nodes[0]["index"])
-        for neighbor in n["neighbors"]:
-            _G.remove_node(neighbor)
-
-        _G.remove_node(n["index"])
-
-    return S
+    G = mis_graph(G)
+    return min_degree_greedy(ResidualGraph(G))
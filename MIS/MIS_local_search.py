@@ -1,33 +1,128 @@
 import rustworkx as rx
-from random import choice
-from itertools import combinations
-from .MIS_exact import MIS_exact
+
+from .solution_state import SolutionState
+from .graph import mis_graph
+from . import anytime
+
+
+def one_tight_neighbors(state, x):
+    """
+    Funcion que retorna los vecinos de x cuyo unico vecino en S es x
+
+    :param state: estado de la solucion
+    :param x: vertice en S
+    :return: lista de vecinos 1-tight de x
+    """
+    tightness = state.tightness
+    return [u for u in state.adj[x] if tightness[u] == 1]
+
+
+def independent_pair(adj, C):
+    """
+    Funcion que busca dos vertices no adyacentes en C. Para cada u se cuentan sus vecinos dentro de C,
+    y solo si no es adyacente a todos se busca con cual, por lo que cuesta O(suma de grados en C)
+
+    :param adj: listas de adyacencia
+    :param C: lista de vertices candidatos
+    :return: par de vertices no adyacentes de C, o None si C es un clique
+    """
+    members = set(C)
+    if len(members) < 2:
+        return None
+    for u in members:
+        if sum(1 for w in adj[u] if w in members) < len(members) - 1:
+            neighbors = set(adj[u])
+            for w in members:
+                if w != u and w not in neighbors:
+                    return u, w
+    return None
+
+
+def fill(state):
+    """
+    Funcion que agrega a S los vertices libres (sin vecinos en S) hasta que S sea maximal
+
+    :param state: estado de la solucion
+    """
+    free = state.V[0]
+    while len(free) > 0:
+        state.add(free.items[-1])
+
+
+def one_two_swap(state, x):
+    """
+    (1,2)-swap: saca x de S y agrega dos vecinos de x no adyacentes entre si cuyo unico vecino en S es x
+
+    :param state: estado de la solucion
+    :param x: vertice en S
+    :return: true si se hizo el intercambio, false si no
+    """
+    pair = independent_pair(state.adj, one_tight_neighbors(state, x))
+    if pair is None:
+        return False
+    state.remove(x)
+    for u in pair:
+        state.add(u)
+    fill(state)
+    return True
+
+
+def two_three_swap(state, x):
+    """
+    (2,3)-swap: saca x y otro vertice y de S y agrega tres vertices no adyacentes entre si cuyos vecinos
+    en S estan en {x, y}. Se supone que no hay (1,2)-swaps, por lo que al menos uno de los tres tiene
+    como vecinos en S justamente a x e y; y se obtiene de la suma de vecinos en S (mate) de ese vertice.
+
+    :param state: estado de la solucion
+    :param x: vertice en S
+    :return: true si se hizo el intercambio, false si no
+    """
+    adj, tightness, mate = state.adj, state.tightness, state.mate
+    two_tight = {}
+    for v in adj[x]:
+        if tightness[v] == 2:
+            two_tight.setdefault(mate[v] - x, []).append(v)
+    if not two_tight:
+        return False
+    Lx = one_tight_neighbors(state, x)
+    for y, Vxy in two_tight.items():
+        C = Lx + one_tight_neighbors(state, y) + Vxy
+        for a in Vxy:
+            a_neighbors = set(adj[a])
+            pair = independent_pair(adj, [c for c in C if c != a and c not in a_neighbors])
+            if pair is not None:
+                state.remove(x)
+                state.remove(y)
+                for u in (a,) + pair:
+                    state.add(u)
+                fill(state)
+                return True
+    return False
+
 
 def MIS_local_search(G, S, k=1):
     """
-    Busqueda local para encontrar el conjunto maximo independiente de un grafo G haciendo k-exchanges sobre
-    un conjunto independiente del grafo dado.
+    Busqueda local para encontrar el conjunto maximo independiente de un grafo G haciendo intercambios
+    sobre un conjunto independiente del grafo dado, al estilo de Andrade, Resende y Werneck: (1,2)-swaps
+    (sacar un vertice y agregar dos) y, si k >= 2, (2,3)-swaps (sacar dos y agregar tres). Los intercambios se
+    encuentran con la tightness de cada vertice, por lo que cada pasada sobre S es casi lineal en el grafo.
 
     :param G: grafo G
     :param S: conjunto independiente de G
-    :param k: cuanto exchanges se van a realizar
-    :return: indices del grafo que conforman un conjunto independiente maximo
-    """ 
-    _G = G.copy()
-    _S = S.copy()
-    if k <= 0 and k >= len(S):
-        return S
-    kS = set(combinations(S, k))
-    node_indexes = G.node_indices()
-    for k_tuple in kS:
-        V = set(S).difference(set(k_tuple))
-        for v in V:
-            v_neighbors = G.neighbors(v)
-            _G.remove_nodes_from(v_neighbors)
-            _G.remove_node(v)
-        newS = set(MIS_exact(_G))
-
-        if len(newS) > k:
-            _S = list(V.union(newS))
-            MIS_local_search(G, _S, k)
-    return _S
+    :param k: cuantos vertices se sacan como maximo en un intercambio; con k < 2 solo se hacen (1,2)-swaps
+    :return: indices del grafo que conforman un conjunto independiente maximal
+    """
+    G = mis_graph(G)
+    state = SolutionState(G, S)
+    fill(state)
+
+    improved = True
+    while improved and not anytime.expired():
+        improved = False
+        for x in list(state.S):
+            if x not in state:
+                continue
+            if one_two_swap(state, x) or (k >= 2 and two_three_swap(state, x)):
+                improved = True
+        anytime.publish(state.S.items)
+    return list(state.solution())
@@ -1,86 +1,51 @@
 
-from random import randint, shuffle, sample
+from random import randint
+import numpy as np
 import rustworkx as rx
 from math import inf
-import json
 import time
 
 from .MIS_heuristic import MIS_heuristic2
+from .graph import mis_graph, adjacency_lists, neighbor_arrays
+from .population import init_population, mutate, sort_population, repair, repair_population, cardinality, decode
+from . import anytime
 
 
-def is_MIS(G, S):
-    """
-    Funcion que recibe un grafo G y un conjunto S de indices de nodos y determina si S es un conjunto independiente maximal
-
-    :param G: grafo dado
-    :param S: posible conjunto independiente maximal de G
-    :return: true si S es MIS para G, false si no
-    """ 
-    for i in range(len(S)):
-        if S[i] == True and any((S[n] == True) for n in G.neighbors(i)): return False
-        if S[i] == False and all((S[n] == False) for n in G.neighbors(i)): return False
-    return True
-
-
-def fitness(G, S):
-    """
-    Funcion que calcula la aptitud de un genotipo como conjunto independiente
-
-    :param G: Grafo sobre el cual calcular la aptitud
-    :param S: genotipo cuya aptitud es calculada
-    :return f: aptitud del genotipo como conjunto independiente
-    """ 
-    f = 0
-    for i in range(len(S)):
-        if S[i] == True: 
-            f += 1 - sum(1 for n in G.neighbors(i) if (S[n] == True)  )
-        else:
-            f -= all((S[n] == False)  for n in G.neighbors(i) )
-    return f
-
-def recomb(G, *P):
+def recomb(G, P):
     """
     Funcion que recombina un conjunto de genotipos padre
 
-    :param P: lista de padres
-    :return: genotipo resultante de la recombinacion
+    :param P: matriz de padres, uno por fila
+    :return: nodos del conjunto independiente resultante y genotipo resultante de la recombinacion
     """ 
-    n_nodes =len(G.node_indices())
+    adj = adjacency_lists(G)
+    n_nodes = P.shape[1]
     nParents = len(P)
-    prob = [sum(i) for i in zip(*P)]
-    h = []
+    prob = P.sum(axis=0)
+    # Cada nodo es candidato con probabilidad proporcional a la cantidad de padres que lo tienen,
+    # y se toma si ningun candidato anterior ya tomado es su vecino
+    candidates = np.flatnonzero(np.random.randint(0, nParents + 1, n_nodes) < prob)
+    h = bytearray(n_nodes)
     S = []
-    for i in range(n_nodes):
-        valid = False
-        if randint(0,nParents) < prob[i]:
-            neighbors = G.neighbors(i)
-            valid = True
-            for n in neighbors:
-                if n < len(h) and h[n] == True: 
-                    valid = False
-                    break
-        if valid: S.append(i)
-        h.append(valid)
-    return S, h
+    for i in candidates.tolist():
+        if not any(h[n] for n in adj[i]):
+            S.append(i)
+            h[i] = 1
+    return S, np.frombuffer(h, dtype=bool).copy()
 
 def improve(G, S, h):
-    Scopy = [i for i in S]
-    shuffle(Scopy)
-    for i in Scopy:
-        if not h[i]: continue
-        for n in G.neighbors(i): h[n] = False
-
-    _G = G.copy()
-    for i in S:
-        for n in _G.neighbors(i): _G.remove_node(n)
-        _G.remove_node(i)
-    Sp = MIS_heuristic2(_G)
+    # Los nodos de S que siguen en h despues de mutar sacan a sus vecinos. Como S es independiente,
+    # el orden en que se procesan no cambia el resultado
+    nbrs = neighbor_arrays(G)
+    kept = [nbrs[i] for i in S if h[i]]
+    if kept:
+        h[np.concatenate(kept)] = False
 
-    for i in Sp: h[i] = True
-    return h
+    # Se sacan los conflictos que agrego la mutacion y se completa con los nodos libres
+    return repair(G, h)
 
 def distance(p1, p2):
-    return sum(i1 != i2 for (i1,i2) in zip(p1,p2) )
+    return np.count_nonzero(p1 != p2, axis=-1)
     # paths = {}
     # for i in p1:
     #     shortest_path = [-1, maxL]
@@ -109,45 +74,21 @@ def distance(p1, p2):
     # return sum(paths.values())
 
 def relink(G, pi, pf):
-    indexes = list(range(len(pi)))
-    shuffle(indexes)
-    relinks = []
-    copypi = [i for i in pi]
-    for i in indexes:
-        if copypi[i] != pf[i]:
-            copypi[i] != pf[i]
-            rl = [i for i in copypi]
-            relinks.append([rl, fitness(G, rl)])
-    return relinks
-
-def mutate(S, mutation_rate):
     """
-    Funcion que genera una mutacion de un genotipo en base a una tasa de mutacion
-
-    :param S: genotipo a mutar
-    :param mutation_rate: tasa de mutacion, cada unidad representa un 0.1 de probabilidad de mutacion
-    :return: genotipo resultante de la mutacion
-    """ 
-    return [i != (randint(0,1000) < mutation_rate) for i in S]
+    Funcion que re-enlaza dos genotipos: recorre en orden aleatorio los nodos en que difieren y, paso a paso,
+    cambia el valor de pi por el de pf. Cada paso del camino es un genotipo nuevo
 
-
-def init_population(G, n_nodes, pop_size, initial_set_size):
+    :param pi: genotipo inicial
+    :param pf: genotipo final
+    :return: genotipos del camino, reparados, y su aptitud
     """
-    Funcion que genera una poblacion inicial de genotipos de tamaño especificado donde el conjunto 
-    que representa cada genotipo tambien tiene un tamaño especificado
-
-    :param n_nodes: numero de nodos del grafo
-    :param pop_size: tamaño de la población
-    :param initial_set_size: tamaño del conjunto representado por los genotipos generados
-    :return pop: poblacion generada
-    """ 
-    pop = []
-    for i in range(pop_size):
-        p = [False for e in range(n_nodes)]
-        for i in range(initial_set_size):
-            p[randint(0,n_nodes-1)] = True
-        pop.append([p, fitness(G, p)])
-    return pop
+    indexes = np.flatnonzero(pi != pf)
+    np.random.shuffle(indexes)
+    # El paso k tiene los primeros k + 1 nodos del camino con el valor de pf
+    relinks = np.tile(pi, (len(indexes), 1))
+    relinks[:, indexes] = np.where(np.tri(len(indexes), dtype=bool), pf[indexes], pi[indexes])
+    relinks = repair_population(G, relinks)
+    return relinks, cardinality(relinks)
 
 def MIS_memetic(G, pop_size, mutation_rate, max_no_improvement):
     """
@@ -157,41 +98,45 @@ def MIS_memetic(G, pop_size, mutation_rate, max_no_improvement):
     :param pop_size: tamaño de la población
     :param mutation_rate: tasa de mutacion en milesimas de porcentaje
     :param max_no_improvement: maximo numero admisible de iteraciones sin mejora
-    :return pop: conjunto independiente maximal encontrado, o conjunto encontrado si 
-    se excede el numero admisible de iteraciones sin mejora
+    :return pop: mayor conjunto independiente maximal encontrado
     """ 
+    G = mis_graph(G)
 
-    pop = init_population(G, len(G.node_indices()), pop_size, len(MIS_heuristic2(G)))
+    pop = repair_population(G, init_population(len(G.active), pop_size, len(MIS_heuristic2(G))))
+    fit = cardinality(pop)
 
-    best = [[],-inf]
+    best = [None, -inf]
     no_improvement = 0
     while True:
-        maxF = [[], -inf] 
-        for p in pop:
-            if p[1] == None: p[1] = fitness(G, p[0])
-            if p[1] > maxF[1]: 
-                maxF = p
-
-        if maxF[1] > best[1]:
-            best = maxF
+        i = int(np.argmax(fit))
+        if fit[i] > best[1]:
+            best = [pop[i].copy(), int(fit[i])]
             no_improvement = 0
+            anytime.publish(decode(best[0]), best[1])
         else: 
             no_improvement +=1
             if no_improvement == max_no_improvement:
                 break
 
-        pop.sort(key=lambda p: p[1])
-        pop = pop[int(len(pop)/2):]
+        if anytime.expired():
+            break
+
+        pop, fit = sort_population(pop, fit)
+        pop, fit = pop[int(len(pop)/2):], fit[int(len(pop)/2):]
 
         children = []
         for i in range(pop_size - len(pop)):
-            P = [u[0] for u in sample(pop, max(2,int(pop_size/20)))]
-            S, child = recomb(G,*P)
+            if anytime.expired():
+                break
+            P = pop[np.random.choice(len(pop), max(2,int(pop_size/20)), replace=False)]
+            S, child = recomb(G, P)
             child = mutate(child, mutation_rate)
-            improve(G, S, child)
-            children.append([child, None])
-        pop += children
-    return [i for i in range(len(best[0])) if best[0][i] == True]
+            children.append(improve(G, S, child))
+        if children:
+            children = np.array(children)
+            pop = np.vstack((pop, children))
+            fit = np.concatenate((fit, cardinality(children)))
+    return decode(best[0])
 
 def MIS_scatter_search(G, ref_set_size, mutation_rate, relinking_rate, max_no_improvement):
     """
@@ -203,53 +148,61 @@ def MIS_scatter_search(G, ref_set_size, mutation_rate, relinking_rate, max_no_im
     :param mutation_rate: tasa de mutacion en milesimas de porcentaje
     :param relinking_rate: porcentaje de elementos sobre el cual realizar re-enlace
     :param max_no_improvement: maximo numero admisible de iteraciones sin mejora
-    :return pop: conjunto independiente maximal encontrado, o conjunto encontrado si 
-    se excede el numero admisible de iteraciones sin mejora
+    :return pop: mayor conjunto independiente maximal encontrado
     """ 
+    G = mis_graph(G)
 
     
-    pop = init_population(G, len(G.node_indices()), ref_set_size*10, len(MIS_heuristic2(G)))
+    pop = repair_population(G, init_population(len(G.active), ref_set_size*10, len(MIS_heuristic2(G))))
+    fit = cardinality(pop)
     relinking_pop = int(ref_set_size*relinking_rate/100)
+    half = ref_set_size//2
 
-    best = [[],-inf]
+    best = [None, -inf]
     no_improvement = 0
     while True:
 
-        pop.sort(key=lambda p: p[1])
-        refSet = pop[-ref_set_size//2:]
-        maxL = refSet[-1]
+        pop, fit = sort_population(pop, fit)
+        refSet, refFit = pop[-half:], fit[-half:]
 
-        if maxL[1] > best[1]:
-            best = maxL
+        if refFit[-1] > best[1]:
+            best = [refSet[-1].copy(), int(refFit[-1])]
             no_improvement = 0
+            anytime.publish(decode(best[0]), best[1])
         else: 
             no_improvement +=1
             if no_improvement == max_no_improvement:
                 break
 
-        popcopy = json.loads(json.dumps(pop))
-        for i in range(ref_set_size//2 + ref_set_size%2):
-            popcopy.sort(key=lambda p: distance( p[0], pop[i][0]))
-            refSet.append(popcopy[-1])
+        if anytime.expired():
+            break
+
+        # Se completa el conjunto de referencia con los genotipos mas lejanos a los de peor aptitud
+        far = [int(np.argmax(distance(pop, pop[i]))) for i in range(half + ref_set_size%2)]
+        refSet, refFit = np.vstack((refSet, pop[far])), np.concatenate((refFit, fit[far]))
 
         children = []
         for i in range(ref_set_size*10 - ref_set_size-relinking_pop):
-            P = [u[0] for u in sample(refSet[:ref_set_size//2], 1)] +  [u[0] for u in sample(refSet[ref_set_size//2:], 1)]
-            S, child = recomb(G,*P)
+            if anytime.expired():
+                break
+            p1 = np.random.randint(0, half)
+            p2 = np.random.randint(half, len(refSet))
+            S, child = recomb(G, refSet[[p1, p2]])
             child = mutate(child, mutation_rate)
-            improve(G, S, child)
-            children.append([child, fitness(G,child)])
-        pop = refSet + children
-
-        relinks = []
-        for i in range(relinking_pop):
-            P = [u[0] for u in sample(refSet[:ref_set_size//2], 2)]
-            rl = relink(G, *P)
-            relinks += rl
-        relinks.sort(key=lambda p: p[1])
-        pop = refSet + children + relinks[-relinking_pop:]  
-
-    return [i for i in range(len(best[0])) if best[0][i] == True]
+            children.append(improve(G, S, child))
+        children = np.array(children, dtype=bool).reshape(-1, pop.shape[1])
+
+        pop = np.vstack((refSet, children))
+        fit = np.concatenate((refFit, cardinality(children)))
+
+        # Se agregan los mejores genotipos de los caminos entre pares del conjunto de referencia
+        relinks = [relink(G, *refSet[np.random.choice(half, 2, replace=False)]) for i in range(relinking_pop)]
+        if relinks:
+            rl, rlFit = sort_population(np.vstack([r[0] for r in relinks]), np.concatenate([r[1] for r in relinks]))
+            pop = np.vstack((pop, rl[-relinking_pop:]))
+            fit = np.concatenate((fit, rlFit[-relinking_pop:]))
+
+    return decode(best[0])
 
 
 def randomGraph(n, e):
@@ -1,22 +1,62 @@
-from numpy.random import choice
-from random import random
+from random import random, randrange
 from math import exp
 import rustworkx as rx
 
 from .MIS_heuristic import MIS_heuristic
+from .solution_state import SolutionState
+from .graph import mis_graph
+from . import anytime
 
 
-def f(G, S, c=2):
+def f(state, c=2):
     """
     Funcion de evaluacion de una posible solucion. Es su tamano pues es lo que buscamos maximizar.
     
-    :pram G: grafo del que se quiere obtener solucio
-    :param S: solucion
+    :param state: estado de la solucion, que lleva la cuenta de los edges en el grafo inducido por la solucion
     :param c: una constante natural positiva por la que se multiplicara el numero de edges en grafo inducido por la solucion. c > 1
     :return: evaluacion numerica (funcion objetivo) de la solucion
     """
-    G_induced_S = G.subgraph(list(S))
-    return -len(S) + (c * G_induced_S.num_edges())
+    return state.objective(c)
+
+
+def delta_f(state, v, removed, c=2):
+    """
+    Funcion que calcula, sin aplicarlo, el cambio de la funcion de evaluacion al hacer el ensayo sobre v.
+    Depende solo de v y de sus vecinos en la solucion actual.
+
+    :param state: estado de la solucion actual
+    :param v: vertice elegido
+    :param removed: vecinos de v en la solucion, que salen de ella si v entra
+    :param c: constante por la que se multiplica el numero de edges en el grafo inducido por la solucion
+    :return: f(solucion tras el ensayo) - f(solucion actual)
+    """
+    # Si v sale de la solucion, el tamano baja en uno y se pierden los lados entre v y la solucion
+    if v in state:
+        return 1 - c * state.tightness[v]
+
+    # Si v entra, salen sus vecinos en la solucion con sus lados (los lados entre ellos se cuentan una sola vez)
+    # y v no agrega lados, pues ya no le quedan vecinos en la solucion
+    lost_edges = sum(state.tightness[u] for u in removed)
+    if lost_edges:
+        removed_set = set(removed)
+        lost_edges -= sum(1 for u in removed for w in state.adj[u] if w in removed_set) // 2
+    return len(removed) - 1 - c * lost_edges
+
+
+def trial_move(state, v, removed):
+    """
+    Funcion que aplica un ensayo sobre la solucion: si v esta en la solucion lo saca, si no lo incluye y saca a sus vecinos.
+
+    :param state: estado de la solucion actual
+    :param v: vertice elegido
+    :param removed: vecinos de v en la solucion
+    """
+    if v in state:
+        state.remove(v)
+        return
+    for u in removed:
+        state.remove(u)
+    state.add(v)
 
 
 def exptbl(difference_f, T_cycle):
@@ -39,19 +79,23 @@ def MIS_simulated_annealing(G, T0 = 10.0, max_cycles=10, max_trials = 250000, ma
     :param max_cycles: numero maximo de ciclos de temperatura a ejecutar
     :param max_trial: en cada ciclo de temperatura se realizan como máximo max_trials. Un trial consiste en seleccionar un vecino de la solución actual.
     :param max_changes: se produce un cambio si se acepta al vecino. Como máximo se permiten max_changes para una temperatura fija.
+        Los ciclos que llegan a max_changes no se cuentan, salvo que ya haya habido max_cycles de ellos.
     :return: indices del grafo que conforman un conjunto independiente maximo
     """
+    G = mis_graph(G)
     # Solucion inicial
     S0 = MIS_heuristic(G)
 
-    # Mejor solucion hasta el momento
-    S = set(S0)
+    # Solucion actual. Los ensayos se evaluan por su diferencia y solo se aplican si se aceptan.
+    # No se necesitan las subvecindades V0, V1, V2 y V>2, solo la tightness de cada vertice
+    state = SolutionState(G, S0, buckets=False)
 
-    # Solucion actual
-    _S = S.copy()
+    # Mejor conjunto independiente encontrado, se copia solo cuando mejora
+    S = set(S0)
+    anytime.publish(S)
 
-    # Evaluacion de la mejor solucion al momento
-    best_f = f(G, S)
+    # Evaluacion de la solucion actual
+    best_f = f(state)
 
     # Temperatura en cada ciclo
     T_cycle = T0
@@ -63,52 +107,61 @@ def MIS_simulated_annealing(G, T0 = 10.0, max_cycles=10, max_trials = 250000, ma
     # Contador del ciclo de temperatura
     cycles = 0
 
+    # Ciclos saturados (que llegan a max_changes) que no se contaron. A temperatura alta casi todo ensayo se acepta y
+    # todos los ciclos se saturan; se permiten a lo sumo max_cycles de ellos sin contar, de modo que se ejecutan a lo
+    # sumo 2 * max_cycles ciclos de temperatura
+    saturated = 0
+
     node_indexes = list(G.node_indexes())
+    n = len(node_indexes)
 
-    while cycles < max_cycles:
+    while cycles < max_cycles and n > 0 and not anytime.expired():
         trials, changes = 0, 0
-        while trials < max_trials and changes < max_changes:
+        while trials < max_trials and changes < max_changes and not anytime.expired():
             # Procedemos con el primer ensayo (trial)
             trials += 1
 
             # Elegimos un vertice random del grafo
-            v = choice(node_indexes)
+            v = node_indexes[randrange(n)]
 
             # Si el vertice esta en la solucion actual, lo sacamos. Si no, lo incluimos y borramos a sus vecinos.
-            if v in _S:
-                _S.remove(v)
-            else:
-                _S.add(v)
-                v_neighbors = G.neighbors(v)
-                for s in S:
-                    if s in v_neighbors:
-                        _S.discard(s)
-            _f = f(G, _S)
+            # Solo se calcula la diferencia en la funcion de evaluacion
+            removed = [] if v in state else state.solution_neighbors(v)
+            difference_f = delta_f(state, v, removed)
 
             # Si el resultado del ensayo por funcion de evaluacion es mejor que el que se tenia de
-            # la mejor solucion al momento, se actualiza la mejor solucion, su evaluacion y se indica
-            # que se hizo un cambio
-            if _f < best_f:
-                S = _S.copy()
-                best_f = _f
+            # la solucion actual, se aplica y se indica que se hizo un cambio
+            if difference_f < 0:
+                trial_move(state, v, removed)
+                best_f += difference_f
+                changes += 1
+
+                if len(state) > len(S) and state.conflicts == 0:
+                    S = state.solution()
+                    anytime.publish(S)
+
+            # Los movimientos laterales (misma evaluacion) siempre se aceptan, pero no cuentan como cambios
+            # para que una meseta no impida que se termine el ciclo de temperatura
+            elif difference_f == 0:
+                trial_move(state, v, removed)
+
+            # De lo contrario, si la diferencia es inferior a 10 * T_cycle se acepta aunque sea peor con una probabilidad de
+            # e ^ (-(difference_f) / T_cycle). Esto es asi ya que como e ^ -10 es muy pequeno, se elije que si difference_f > 10 * Tk es rechazado.
+            # Si la temperatura es alta, el procedimiento acepta vecinos que empeoran el resultado con alta probabilidad. A medida que disminuye la temperatura,
+            # también lo hace la probabilidad de aceptar a un vecino que degrada la solucion
+            elif difference_f < 10 * T_cycle and exptbl(difference_f, T_cycle) > random():
+                trial_move(state, v, removed)
+                best_f += difference_f
                 changes += 1
-            else:
-                # De lo contrario, cuando la funcion de evaluacion del trial no sea mejor, consideramos
-                # su diferencia con la mejor evaluacion al momento
-                difference_f = _f - best_f
-
-                # Si la diferencia es inferior a 10 * T_cycle se acepta aunque sea peor con una probabilidad de
-                # e ^ (-(difference_f) / T_cycle). Esto es asi ya que como e ^ -10 es muy pequeno, se elije que si difference_f > 10 * Tk es rechazado.
-                if 0 <= difference_f and difference_f < 10 * T_cycle:
-                    # Si la temperatura es alta, el procedimiento acepta vecinos que empeoran el resultado con alta probabilidad. A medida que disminuye la temperatura,
-                    # también lo hace la probabilidad de aceptar a un vecino que degrada la solucion
-                    if exptbl(difference_f, T_cycle) > random():
-                        S = _S.copy()
-                        best_f = _f
-                        changes += 1
-            _S = S.copy()
         # Actualizamos la temperatura (nuestro cooling schedule o proceso de enfriamiento)
         T_cycle = T_cycle * alpha
-        if changes < max_changes:
+        if changes < max_changes or saturated >= max_cycles:
             cycles += 1
-    return list(S)
+        else:
+            saturated += 1
+
+    # La mejor solucion se completa con los vertices que hayan quedado libres para que sea maximal
+    state = SolutionState(G, S)
+    while len(state.V[0]) > 0:
+        state.add(state.V[0].items[-1])
+    return list(state.solution())
@@ -1,295 +1,244 @@
-from numpy.random import choice
-from random import randrange
+from random import randrange, choice
+import numpy as np
 import rustworkx as rx
 
 from .MIS_heuristic import MIS_heuristic
+from .graph import mis_graph, degrees
+from .solution_state import SolutionState
+from . import anytime
 
 def f(S):
     """
     Funcion de evaluacion de una posible solucion. Es su tamano pues es lo que buscamos maximizar.
     
-    :param S: solucion
+    :param S: solucion (conjunto o estado de la solucion)
     :return: tamano de la solucion
     """
     return len(S)
 
 
-def updateV(V, Vk):
+def make_tabu(tabu_until, vertices, itr):
     """
-    Funcion que actualiza una subvecindad Vk de la vecindad V
+    Funcion que marca vertices como tabu hasta una iteracion dada (inclusive). Si un vertice ya era tabu
+    por mas tiempo, se mantiene el plazo mas largo
 
-    :param V: conjunto vecindad
-    :param Vk: subconjunto de la vecindad cuyos vertices tiene k vecinos en la solucion
+    :param tabu_until: ultima iteracion en que cada vertice es tabu
+    :param vertices: vertices a marcar
+    :param itr: ultima iteracion en que los vertices son tabu
     """
-    V.update(Vk)
+    tabu_until[vertices] = np.maximum(tabu_until[vertices], itr)
 
-
-def updateT(T, itr):
-    """
-    Funcion que actualiza la lista tabu cuando se cumple que el numero de iteraciones que debe tener un vertice en ella
-    desde que fue retirado en un swap de la solucion es igual a la iteracion actual (criterio de aceptación)
-
-    :param T: lista tabu
-    :param itr: iteracion actual
-    :return: lista tabu actualizada
+def non_tabu(Vk, tabu_until, itr):
     """
-    _T = T.copy()
-    for t in T:
-        if t[1] == itr:
-            _T.remove(t)
-    return _T
-
-def check_in_T(Vk, T):
-    """
-    Funcion que chequea si un posible vertice en Vk para hacer swap es tabu o no
+    Funcion que filtra los vertices de Vk que no son tabu en la iteracion actual. Ver si un vertice es tabu
+    es una comparacion y los vertices dejan de ser tabu solos al pasar la iteracion, pero el filtro recorre
+    toda la subvecindad: cuesta O(|Vk|) en cada iteracion
     
     :para Vk: subconjunto de la vecindad cuyos vertices tiene k vecinos en la solucion
-    :param T: lista tabu
-    :return: Vk con aquellos vertices que son validos
+    :param tabu_until: ultima iteracion en que cada vertice es tabu
+    :param itr: iteracion actual
+    :return: arreglo con los vertices de Vk que son validos
     """
-    _Vk = Vk.copy()
-    for v in Vk:
-        for t in T:
-            if v[0] == t[0]:
-                _Vk.discard(v)
-
-    return _Vk
+    Vk = np.fromiter(Vk, dtype=np.int64, count=len(Vk))
+    return Vk[tabu_until[Vk] < itr]
 
-def get_Vk(G, S, k, method=lambda x, y: x == y):
+def get_Vk(state, k):
     """
     Funcion que obtiene una subvecindad Vk para k (0, 1, 2, >2) siendo k el numero
-    de vertices vecinos que tiene un vertice v en Vk presentes en la solucion S
+    de vertices vecinos que tiene un vertice v en Vk presentes en la solucion. Las subvecindades
+    se mantienen en el estado de la solucion, por lo que la consulta es O(1)
 
-    :param G: grafo del que queremos el conjunto independiente maximo
-    :param S: solucion actual
-    :param k: numero de vertices en la solucion vecinos al vertice no solucion a intercambiar. k >= 0
-    :param method: metodo que compara el numero de vertices vecinos en S a un v en G que no forme parte de S con k
+    :param state: estado de la solucion actual
+    :param k: numero de vertices en la solucion vecinos al vertice no solucion a intercambiar. k = 3 representa V>2
     :return: subvecindad Vk
     """
-    
-    node_indexes = list(G.node_indexes())
-    V = set()
+    return state.V[k]
+
+def diversifying_degree(state, degree, V):
+    """
+    Funcion que calcula el grado de diversificacion de vertices fuera de la solucion, es decir,
+    cuantos vecinos tiene cada uno en el grafo sin considerar los que estan en la solucion
+
+    :param state: estado de la solucion actual
+    :param degree: grado de cada vertice del grafo
+    :param V: arreglo de vertices fuera de la solucion
+    :return: arreglo con el grado de diversificacion de cada vertice de V
+    """
+    tightness = np.fromiter(map(state.tightness.__getitem__, V.tolist()), dtype=np.int64, count=len(V))
+    return degree[V] - tightness
 
-    for v in node_indexes:
-        v_neighbors = set(G.neighbors(v))
-        v_neighbors_in_S = v_neighbors.intersection(S)
-        if v not in S and method(len(v_neighbors_in_S), k):
-            V.add((v, tuple(v_neighbors_in_S)))
+def swap(state, v):
+    """
+    Funcion que agrega v a la solucion retirando sus vecinos en ella (swap(k, 1))
 
-    return V
+    :param state: estado de la solucion actual
+    :param v: vertice fuera de la solucion
+    :return: vertices retirados de la solucion
+    """
+    removed_verteces = state.solution_neighbors(v)
+    for u in removed_verteces:
+        state.remove(u)
+    state.add(v)
+    return removed_verteces
 
-def intensification_move(G, V, S, k, T, itr):
+def intensification_move(state, degree, Vk, k, tabu_until, itr):
     """
     Funcion que intercambio un (1) vertice no parte de la solucion S por sus k vertices
-    vecinos en S
+    vecinos en S. Las reglas de seleccion se calculan con NumPy sobre toda la subvecindad a la vez, por lo que
+    elegir el vertice cuesta O(|Vk|); solo la actualizacion de las subvecindades despues del swap es local
 
-    :param G: grafo del que queremos el conjunto independiente maximo
-    :param V: vecindad de S
-    :param S: solucion actual
+    :param state: estado de la solucion actual, se modifica con el movimiento
+    :param degree: grado de cada vertice del grafo
+    :param Vk: arreglo con los vertices de la subvecindad Vk que no son tabu
     :param k: numero de vertices en la solucion vecinos al vertice no solucion a intercambiar. 0 <= k < 2
-    :param T: lista tabu
+    :param tabu_until: ultima iteracion en que cada vertice es tabu, se marcan los vertices retirados
     :param itr: iteracion actual
-    :return: solucion con un movimiento realizado
     """
 
-    V0, V1, V2 = V["V0"], V["V1"], V["V2"]
-    V_gt_2 = V["V>2"]
+    V2, V_gt_2 = get_Vk(state, 2), get_Vk(state, 3)
     tt = 0 # iteraciones que deben pasar para que un vertice sacado de S deje de ser tabu
-    _S = S.copy()
-    _T = T.copy()
 
     # Si k es 0, vamos a mejorar S y podemos insertar un vertice random de la subvecindad V0 sin problemas en S
     if k == 0:
-        _S.add(choice([v[0] for v in V0]))
+        state.add(int(choice(Vk)))
+        return
+
+    # Si k no es 0, entonces es 1 y vamos a hacer un intercambio vacado en el grado de expansion de los vertices en S
+    # El grado de expansion para un v en S es a cuantos vertices es vecino para aquellos en la subvecindad V1
+    # expand_degree[i] es el grado de expansion del vecino en S de V1[i]
+    V1 = Vk
+    mates = np.fromiter(map(state.mate.__getitem__, V1.tolist()), dtype=np.int64, count=len(V1))
+    _, mate_index, mate_count = np.unique(mates, return_inverse=True, return_counts=True)
+    expand_degree = mate_count[mate_index]
+
+    # Si hay más movimientos swap(1,1) que swap(k, 1) (k > 1) (es decir, |V1| > |V2| + |V>2|), 
+    # excluimos de V1 cualquier vértice vi tal que su vecino adyacente vj tiene un grado de expansión de 1
+    # porque seria un "side-walk" o movimiento lateral y vamos a tratar de evitar hacerlos seguidos. Saco vj de S para meter a vi y el unico vecino que tiene ahora dentro vj es vi
+    if len(V1) > len(V2) + len(V_gt_2):
+        # Elegir tt se basa en que cuando hay muchos movimientos laterales 
+        # el vértice que acaba de salir de la solución no será aceptado 
+        # antes de haber intentado un número de movimientos laterales tan alto como |V1|.
+        tt = len(V1)
+        side_walk = expand_degree == 1
+        V1, expand_degree = V1[~side_walk], expand_degree[~side_walk]
     else:
-        # Si k no es 0, entonces es 1 y vamos a hacer un intercambio vacado en el grado de expansion de los vertices en S
-        # El grado de expansion para un v en S es a cuantos vertices es vecino para aquellos en la subvecindad V1
-        expand_degree = {}
-        for v in V1:
-            u = v[1][0]
-            expand_degree[u] = 1 if expand_degree.get(
-                u, None) is None else expand_degree[u] + 1
-        expand_degree = dict(
-            sorted(expand_degree.items(), key=lambda item: item[1]))
-
-        # Si hay más movimientos swap(1,1) que swap(k, 1) (k > 1) (es decir, |V1| > |V2| + |V>2|), 
-        # excluimos de V1 cualquier vértice vi tal que su vecino adyacente vj tiene un grado de expansión de 1
-        # porque seria un "side-walk" o movimiento lateral y vamos a tratar de evitar hacerlos seguidos. Saco vj de S para meter a vi y el unico vecino que tiene ahora dentro vj es vi
-        if len(V1) > len(V2) + len(V_gt_2):
-            _V1 = V1.copy()
-            for v in V1:
-                u = v[1][0]
-                if expand_degree[u] == 1:
-                    _V1.remove(v)
-                    del expand_degree[u]
-            # Elegir tt se basa en que cuando hay muchos movimientos laterales 
-            # el vértice que acaba de salir de la solución no será aceptado 
-            # antes de haber intentado un número de movimientos laterales tan alto como |V1|.
-            tt = len(V1)
-            V1 = _V1
-        else:
-            # Si no es un movimiento lateral no hace falta marcarlo tabu por demasiado tiempo.
-            tt = 10 + randrange(len(V1))
-
-        # Aplicamos una regla de seleccion tal que en _V1 tomaremos cualquier v en V1 tal que
-        # su vecino en S tiene el mayor grado de expansión de todos los consideramos 
-        _V1 = set()
-        max_expand_degree = next(iter(expand_degree.values()))
-
-        for v in V1:
-            u = v[1][0]
-            if expand_degree[u] == max_expand_degree:
-                _V1.add(v)
-                
-        # Luego, si _V1 solo tiene un vertice, tomamos ese para el swap(1,1)
-        if len(_V1) == 1:
-            v1 = list(V1)[0]
-            _S.add(v1[0])
-            removed_verteces = set(v1[1])
-        else:
-            # Si no eligiremos el vertices con el mayor grado de diversificacion. Esto es,
-            # el vertices en _V1 que mas vecinos tenga en el grafo sin considerar los que estan en S
-            by_best_diversifying_degree = sorted(
-                _V1, key=lambda v: len(set(G.neighbors(v[0])).difference(S)))
-
-            if (len(by_best_diversifying_degree) > 0):
-                _S.add(by_best_diversifying_degree[0][0])
-                removed_verteces = set(by_best_diversifying_degree[0][1])
-            else:
-                removed_verteces = set()
+        # Si no es un movimiento lateral no hace falta marcarlo tabu por demasiado tiempo.
+        tt = 10 + randrange(len(V1))
 
-        _S = _S.difference(removed_verteces)
-        _T = T.union({(removed_vertex, itr + tt)
-                     for removed_vertex in removed_verteces})
+    if len(expand_degree) == 0:
+        return
 
-    # Actualizamos la vecindad
-    V0_1 = {'V%s' % (i): get_Vk(G, _S, i) for i in range(2)}
-    updateV(V, V0_1)
+    # Aplicamos una regla de seleccion tal que en _V1 tomaremos cualquier v en V1 tal que
+    # su vecino en S tiene el mayor grado de expansión de todos los consideramos 
+    _V1 = V1[expand_degree == expand_degree.min()]
 
-    return _S, _T
+    # Luego, si _V1 solo tiene un vertice, tomamos ese para el swap(1,1)
+    # Si no eligiremos el vertices con el mayor grado de diversificacion. Esto es,
+    # el vertices en _V1 que mas vecinos tenga en el grafo sin considerar los que estan en S
+    v = int(_V1[np.argmin(diversifying_degree(state, degree, _V1))])
+    make_tabu(tabu_until, swap(state, v), itr + tt)
 
-def diversification_move(G, V, S, T, itr):
+def diversification_move(state, degree, tabu_until, itr):
     """
     Funcion que perturba la solucion S por medio de retirar los k vertices vecinos presentes en S
     para un k >= 2. Esto "retorna una peor solucion" por un k - 1
 
-    :param G: grafo del que queremos el conjunto independiente maximo
-    :param V: vecindad de S
-    :param S: solucion actual
-    :param T: lista tabu
+    :param state: estado de la solucion actual, se modifica con el movimiento
+    :param degree: grado de cada vertice del grafo
+    :param tabu_until: ultima iteracion en que cada vertice es tabu, se marcan los vertices retirados
     :param itr: iteracion actual
-    :return: solucion perturbada
     """
-    _S = S.copy()
-    _T = T.copy()
-    
     # Si |V1| > |V2| + |V>2 |, usamos V>2 para realizar una fuerte
     # perturbación mediante un movimiento swap(k, 1) (k > 2)
-    if len(V["V1"]) > len(V["V2"]) + len(V["V>2"]):
-        Vk = V["V>2"]
+    if len(get_Vk(state, 1)) > len(get_Vk(state, 2)) + len(get_Vk(state, 3)):
+        Vk = get_Vk(state, 3)
     # Si no se cumple lo anterior, elegimos una perturbacion fuerte o una mas suave (V2) con 
     # la misma probabilidad
     else:
-        possible_Vk = ["V2", "V>2"]
-        Vk = V[choice(possible_Vk, 1, p=[0.5, 0.5])[0]]
-        
-    # Luego seleccionamos un vértice elegible v de la subvecindad elegida con el mayor grado de diversidad.
-    by_best_diversifying_degree = sorted(
-        Vk, key=lambda v: len(set(G.neighbors(v[0])).difference(S)))
-
-    if (len(by_best_diversifying_degree) > 0):
-        _S.add(by_best_diversifying_degree[0][0])
-        removed_verteces = set(by_best_diversifying_degree[0][1])
-        _S = _S.difference(removed_verteces)
+        Vk = get_Vk(state, choice([2, 3]))
 
+    # Luego seleccionamos un vértice elegible v de la subvecindad elegida con el mayor grado de diversidad.
+    if (len(Vk) > 0):
+        Vk = np.fromiter(Vk, dtype=np.int64, count=len(Vk))
+        v = int(Vk[np.argmin(diversifying_degree(state, degree, Vk))])
         # Los vertices retirados podran usarse luego de tan solo siete (7) iteraciones
-        _T = T.union({(removed_vertex, itr + 7)
-                     for removed_vertex in removed_verteces})
-
-    # Actualizamos la vecindad
-    V2 = {'V2': get_Vk(G, S, 2)}
-    V_gt_2 = {'V>2': get_Vk(G, S, 2, lambda x, y: x > 2)}
+        make_tabu(tabu_until, swap(state, v), itr + 7)
 
-    updateV(V, V2)
-    updateV(V, V_gt_2)
-
-    return _S, _T
-
-def elegible_intensification_move(V, T):
+def elegible_intensification_move(state, tabu_until, itr):
     """
     Funcion que chequea si hay un movimiento de intensificacion posible en la vecindad.
     En otras palabras, si podemos hacer swap(k, 1) para k = 0, 1
     
-    :para V: vecindad de la busqueda tabu
-    :param T: lista tabu
-    :return: si existe algun movimiento de itensificacion y, si hay, el k correspondiente
+    :param state: estado de la solucion actual
+    :param tabu_until: ultima iteracion en que cada vertice es tabu
+    :param itr: iteracion actual
+    :return: si existe algun movimiento de itensificacion y, si hay, el k correspondiente y los vertices no tabu de Vk
     """
-    # Verificamos si la subvecindad V0 tiene vertices y esos no estan en T; es decir, no son tabu
-    _V0 = check_in_T(V["V0"], T)
+    # Verificamos si la subvecindad V0 tiene vertices que no son tabu
+    _V0 = non_tabu(get_Vk(state, 0), tabu_until, itr)
     if len(_V0) > 0:
-        updateV(V, {"V0": _V0})
-        return True, 0
+        return True, 0, _V0
 
-    # Verificamos si la subvecindad V1 tiene vertices y esos no estan en T; es decir, no son tabu
-    _V1 = check_in_T(V["V1"], T)
+    # Verificamos si la subvecindad V1 tiene vertices que no son tabu
+    _V1 = non_tabu(get_Vk(state, 1), tabu_until, itr)
     if len(_V1) > 0:
-        updateV(V, {"V1": _V1})
-        return True, 1
+        return True, 1, _V1
 
-    return False, None
+    return False, None, None
 
 
 def MIS_tabu_search(G, max_iter=10):
     """
     Busqueda tabu para encontrar el conjunto maximo independiente de un grafo G.
 
+    Las subvecindades V0, V1, V2 y V>2 se mantienen en el estado de la solucion y cada movimiento las actualiza
+    en O(grado) de los vertices movidos. La eleccion del movimiento (filtrar los vertices tabu y ordenar V1 por
+    grado de expansion y de diversificacion) sigue siendo lineal en el tamano de la subvecindad elegida.
+
     :param G: grafo G
     :param max_iter: numero maximo de iteraciones a ejecutar
     :return: indices del grafo que conforman un conjunto independiente maximo
     """
+    G = mis_graph(G)
     # Solucion inicial
     S0 = MIS_heuristic(G)
 
     # Mejor solucion hasta el momento
     S = set(S0)
     
-    # Solucion actual
-    _S = S.copy()
+    # Solucion actual, con sus subvecindades V0, V1, V2 y V>2
+    state = SolutionState(G, S0)
     
     # Tamano del la mejor solucion
     best_f = f(S)
+    anytime.publish(S)
 
-    # Inicializamos la lista tabu
-    T = set()
-
-    V0_2 = {'V%s' % (i): get_Vk(G, S, i) for i in range(3)}
-    V_gt_2 = {'V>2': get_Vk(G, S, 2, lambda x, y: x > 2)}
-
-    V = {}
-    updateV(V, V0_2)
-    updateV(V, V_gt_2)
+    # Inicializamos la lista tabu: un vertice es tabu en la iteracion itr si tabu_until[v] >= itr
+    tabu_until = np.full(len(state.adj), -1, dtype=np.int64)
+    degree = degrees(G)
 
     for itr in range(max_iter):
+        if anytime.expired():
+            break
         
         # Chequeamos si podemos intensificar
-        elegible_intensification, k = elegible_intensification_move(V, T)
+        elegible_intensification, k, Vk = elegible_intensification_move(state, tabu_until, itr)
 
         if elegible_intensification:
 
-            _S, T = intensification_move(G, V, _S, k, T, itr)
-            _f = f(_S)
+            intensification_move(state, degree, Vk, k, tabu_until, itr)
+            _f = f(state)
 
             # Si intensificamos y el resultado es mejor acorde a la funcion de evaluacion
             if best_f < _f:
-                S = _S.copy()
+                S = state.solution()
                 best_f = _f
+                anytime.publish(S)
         else:
             # Cuando la solución actual no puede mejorarse mediante un swap(0,1) 
             # o modificarse mediante un swap(1,1), 
             # el procedimiento de búsqueda queda atrapado en un óptimo local
             # vamos a perturbar la solucion actual
-            _S, T = diversification_move(G, V, _S, T, itr)
+            diversification_move(state, degree, tabu_until, itr)
 
-        T = updateT(T, itr)
-        
     return list(S)
@@ -1,63 +1,31 @@
 
-from random import randint, shuffle, sample, choice, random
+from random import randint, randrange, random
+import numpy as np
 import rustworkx as rx
 from math import inf
-import json
 import time
 
 from .MIS_heuristic import MIS_heuristic2
-
-
-def fitness(G, S):
-    """
-    Funcion que calcula la aptitud de un genotipo como conjunto independiente
-
-    :param G: Grafo sobre el cual calcular la aptitud
-    :param S: genotipo cuya aptitud es calculada
-    :return f: aptitud del genotipo como conjunto independiente
-    """
-    f = 0
-    for i in range(len(S)):
-        if S[i] == True:
-            f += 1 - sum(1 for n in G.neighbors(i) if (S[n] == True))
-        else:
-            f -= all((S[n] == False) for n in G.neighbors(i))
-    return f
+from .population import init_population, mutate, sort_population, repair, repair_population, cardinality, decode
+from .graph import mis_graph
+from . import anytime
 
 
 def levyFlight(u, a=1.6):
     return 1.0/(1.0-u)**(1.0/a)
 
 
-def mutate(S, mutation_rate):
-    """
-    Funcion que genera una mutacion de un genotipo en base a una tasa de mutacion
-
-    :param S: genotipo a mutar
-    :param mutation_rate: tasa de mutacion, cada unidad representa un 0.1 de probabilidad de mutacion
-    :return: genotipo resultante de la mutacion
+def random_population(G, pop_size, initial_set_size):
     """
-    return [i != (randint(0, 1000) < mutation_rate) for i in S]
+    Funcion que genera una poblacion aleatoria de genotipos con init_population, la repara y calcula su aptitud
 
-
-def init_population(G, pop_size, initial_set_size):
-    """
-    Funcion que genera una poblacion inicial de genotipos de tamaño especificado donde el conjunto 
-    que representa cada genotipo tambien tiene un tamaño especificado
-
-    :param n_nodes: numero de nodos del grafo
+    :param G: grafo sobre el que ejecutar el algoritmo
     :param pop_size: tamaño de la población
     :param initial_set_size: tamaño del conjunto representado por los genotipos generados
-    :return pop: poblacion generada
+    :return: poblacion generada y aptitud de cada genotipo
     """
-    n_nodes = len(G.node_indices())
-    pop = []
-    for i in range(pop_size):
-        p = [False for e in range(n_nodes)]
-        for i in range(initial_set_size):
-            p[randint(0, n_nodes-1)] = True
-        pop.append([p, fitness(G, p)])
-    return pop
+    pop = repair_population(G, init_population(len(G.active), pop_size, initial_set_size))
+    return pop, cardinality(pop)
 
 
 def MIS_material_pouch(G, pop_size, planter_replacement_rate, max_no_improvement):
@@ -68,46 +36,51 @@ def MIS_material_pouch(G, pop_size, planter_replacement_rate, max_no_improvement
     :param pop_size: tamaño de la población
     :param planter_replacement_rate: tasa de reemplazo de las peores macetas por iteracion
     :param max_no_improvement: maximo numero admisible de iteraciones sin mejora
-    :return pop: conjunto independiente maximal encontrado, o conjunto encontrado si 
-    se excede el numero admisible de iteraciones sin mejora
+    :return pop: mayor conjunto independiente maximal encontrado
     """
+    G = mis_graph(G)
 
     # estimar el tamaño de la solucion usando la heuristica
     estimate = len(MIS_heuristic2(G))
 
     # inicializacion de la poblacion aleatoria
-    planters = init_population(G, pop_size, estimate)
+    planters, fit = random_population(G, pop_size, estimate)
     # cantidad de las peores macetas a reemplazar por iteracion
     n_replace = int(pop_size*planter_replacement_rate)
 
-    best = [[], -inf]
+    best = [None, -inf]
     no_improvement = 0
     while True:
         # generar un nuevo componente material con la funcion de mutacion con tasa de mutacion dependiendo de un vuelo de levy
-        material_pouch = mutate(choice(planters)[0], levyFlight(random()))
-        material_pouch = [material_pouch, fitness(G, material_pouch)]
+        material_pouch = repair(G, mutate(planters[randrange(len(planters))], levyFlight(random())))
+        material_fit = cardinality(material_pouch)
 
         # se escoge una maceta aleatorio y se reemplaza su valor por el componente material si el componente material es mejor
-        planter = choice(planters)
-        if planter[1] < material_pouch[1]:
-            planter[0] = material_pouch[0]
-            planter[1] = material_pouch[1]
+        planter = randrange(len(planters))
+        if fit[planter] < material_fit:
+            planters[planter] = material_pouch
+            fit[planter] = material_fit
 
-        planters.sort(key=lambda x: x[1])
+        planters, fit = sort_population(planters, fit)
 
         # se reemplazan las peores macetas por macetas aleatorios
-        planters = init_population(G, n_replace, estimate) + planters[n_replace:]
-        planters.sort(key=lambda x: x[1])
+        new_planters, new_fit = random_population(G, n_replace, estimate)
+        planters, fit = sort_population(np.vstack((new_planters, planters[n_replace:])),
+                                        np.concatenate((new_fit, fit[n_replace:])))
 
-        if planters[-1][1] > best[1]:
-            best = planters[-1]
+        if fit[-1] > best[1]:
+            best = [planters[-1].copy(), int(fit[-1])]
             no_improvement = 0
+            anytime.publish(decode(best[0]), best[1])
         else:
             no_improvement += 1
             if no_improvement == max_no_improvement:
                 break
 
-    return [i for i in range(len(best[0])) if best[0][i] == True]
+        if anytime.expired():
+            break
+
+    return decode(best[0])
 
 
 def MIS_wizard_search(G, pop_size, GMCR, SAR, SM, max_no_improvement):
@@ -120,41 +93,45 @@ def MIS_wizard_search(G, pop_size, GMCR, SAR, SM, max_no_improvement):
     :param SAR: tasa de ajuste de hechizo (Spell adjustment rate) 
     :param SM: numero de semillas (seed number) es la cantidad máxima de cambio permitida en el ajuste del hechizo de una variable de diseño
     :param max_no_improvement: maximo numero admisible de iteraciones sin mejora
-    :return pop: conjunto independiente maximal encontrado, o conjunto encontrado si 
-    se excede el numero admisible de iteraciones sin mejora
+    :return pop: mayor conjunto independiente maximal encontrado
     """
+    G = mis_graph(G)
 
     # estimar el tamaño de la solucion usando la heuristica
     estimate = len(MIS_heuristic2(G))
 
     # inicializacion de la poblacion aleatoria
-    GM = init_population(G, pop_size, estimate)
-    GM.sort(key=lambda x: x[1])
-    best = [[], -inf]
+    GM, fit = sort_population(*random_population(G, pop_size, estimate))
+    best = [None, -inf]
     no_improvement = 0
     while True:
 
         if randint(0, 100) < GMCR:
-            new_grimoire = [choice(GM)[0][i]
-                           for i in range(len(G.node_indices()))]
+            new_grimoire = GM[randrange(len(GM))].copy()
             if randint(0, 100) < SAR:
                 new_grimoire = mutate(new_grimoire, SM)
         else:
-            new_grimoire = init_population(G, 1, estimate)[0][0]
-        new_grimoire = [new_grimoire, fitness(G, new_grimoire)]
+            new_grimoire = init_population(len(G.active), 1, estimate)[0]
+        new_grimoire = repair(G, new_grimoire)
+        new_fit = cardinality(new_grimoire)
 
-        if GM[0][1] < new_grimoire[1]:
+        if fit[0] < new_fit:
             GM[0] = new_grimoire
-            GM.sort(key=lambda x: x[1])
+            fit[0] = new_fit
+            GM, fit = sort_population(GM, fit)
 
-        if GM[-1][1] > best[1]:
-            best = GM[-1]
+        if fit[-1] > best[1]:
+            best = [GM[-1].copy(), int(fit[-1])]
             no_improvement = 0
+            anytime.publish(decode(best[0]), best[1])
         else:
             no_improvement += 1
             if no_improvement == max_no_improvement:
                 break
-    return [i for i in range(len(best[0])) if best[0][i] == True]
+
+        if anytime.expired():
+            break
+    return decode(best[0])
 
 
 def MIS_wizard_search_material_pouch(G, pop_size, planter_replacement_rate, GMCR, SAR, SM, max_no_improvement):
@@ -168,49 +145,54 @@ def MIS_wizard_search_material_pouch(G, pop_size, planter_replacement_rate, GMCR
     :param SAR: tasa de ajuste de hechizo (Spell adjustment rate) 
     :param SM: numero de semillas (seed number) es la cantidad máxima de cambio permitida en el ajuste del hechizo de una variable de diseño
     :param max_no_improvement: maximo numero admisible de iteraciones sin mejora
-    :return pop: conjunto independiente maximal encontrado, o conjunto encontrado si 
-    se excede el numero admisible de iteraciones sin mejora
+    :return pop: mayor conjunto independiente maximal encontrado
     """
+    G = mis_graph(G)
 
     # estimar el tamaño de la solucion usando la heuristica
     estimate = len(MIS_heuristic2(G))
 
     # inicializacion de la poblacion aleatoria
-    planters = init_population(G, pop_size, estimate)
+    planters, fit = random_population(G, pop_size, estimate)
     # cantidad de las peores macetas a reemplazar por iteracion
     n_replace = int(pop_size*planter_replacement_rate)
 
-    best = [[], -inf]
+    best = [None, -inf]
     no_improvement = 0
     while True:
         # generar un nuevo componente material aplicando wizard search
         if randint(0, 100) < GMCR:
-            material_pouch = [choice(planters)[0][i]
-                      for i in range(len(G.node_indices()))]
+            material_pouch = planters[randrange(len(planters))].copy()
             if randint(0, 100) < SAR:
                 material_pouch = mutate(material_pouch, SM)
         else:
-            material_pouch = init_population(G, 1, estimate)[0][0]
-        material_pouch = [material_pouch, fitness(G, material_pouch)]
+            material_pouch = init_population(len(G.active), 1, estimate)[0]
+        material_pouch = repair(G, material_pouch)
+        material_fit = cardinality(material_pouch)
 
         # se escoge una maceta aleatoria y se reemplaza su valor por el componente material si el componente material es mejor
-        planter = choice(planters)
-        if planter[1] < material_pouch[1]:
-            planter[0] = material_pouch[0]
-            planter[1] = material_pouch[1]
+        planter = randrange(len(planters))
+        if fit[planter] < material_fit:
+            planters[planter] = material_pouch
+            fit[planter] = material_fit
 
-        planters.sort(key=lambda x: x[1])
+        planters, fit = sort_population(planters, fit)
 
         # se reemplazan las peores macetas por macetas aleatorias
-        planters = init_population(G, n_replace, estimate) + planters[n_replace:]
-        planters.sort(key=lambda x: x[1])
+        new_planters, new_fit = random_population(G, n_replace, estimate)
+        planters, fit = sort_population(np.vstack((new_planters, planters[n_replace:])),
+                                        np.concatenate((new_fit, fit[n_replace:])))
 
-        if planters[-1][1] > best[1]:
-            best = planters[-1]
+        if fit[-1] > best[1]:
+            best = [planters[-1].copy(), int(fit[-1])]
             no_improvement = 0
+            anytime.publish(decode(best[0]), best[1])
         else:
             no_improvement += 1
             if no_improvement == max_no_improvement:
                 break
 
-    return [i for i in range(len(best[0])) if best[0][i] == True]
+        if anytime.expired():
+            break
+
+    return decode(best[0])
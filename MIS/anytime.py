@@ -0,0 +1,131 @@
+from time import monotonic
+
+# Protocolo cooperativo de tiempo limite. El que ejecuta un algoritmo (por ejemplo functions.timeout) llama a
+# start con el tiempo limite; los algoritmos publican su mejor solucion cada vez que mejora y revisan expired en
+# su ciclo principal para terminar a tiempo retornando lo mejor que tengan. El estado es por proceso.
+# Si el algoritmo resuelve un grafo reducido (ver reduce.MIS_reduced), sus soluciones se llevan al grafo original
+# con las funciones de lifts; esto se hace solo al pedir el incumbente, no en cada publicacion.
+
+start_time = None
+deadline = None
+incumbent = None
+lifts = ()
+
+
+def start(time_limit=None):
+    """
+    Funcion que inicia una ejecucion con tiempo limite y descarta el incumbente anterior
+
+    :param time_limit: tiempo limite en segundos, None si no hay limite
+    """
+    global start_time, deadline, incumbent
+    start_time = monotonic()
+    deadline = None if time_limit is None else start_time + time_limit
+    incumbent = None
+
+
+def stop():
+    """
+    Funcion que termina la ejecucion actual; a partir de ahora expired siempre es falso
+    """
+    global deadline
+    deadline = None
+
+
+def expired():
+    """
+    Funcion que indica si ya paso el tiempo limite de la ejecucion actual
+
+    :return: true si hay tiempo limite y ya paso, false si no
+    """
+    return deadline is not None and monotonic() >= deadline
+
+
+def remaining():
+    """
+    Funcion que retorna el tiempo que queda de la ejecucion actual
+
+    :return: segundos hasta el tiempo limite (0 si ya paso), None si no hay tiempo limite
+    """
+    return None if deadline is None else max(0.0, deadline - monotonic())
+
+
+def limit(time_limit=None, until=None):
+    """
+    Funcion que adelanta el tiempo limite a time_limit segundos desde ahora, si es antes que el actual. Sirve para
+    repartir el tiempo entre partes de una ejecucion; si no hay tiempo limite no hace nada. Con until se da el
+    instante limite (de monotonic) en lugar de los segundos, y se usa aunque no haya tiempo limite, por ejemplo
+    en un proceso que recibe el instante limite de otro
+
+    :param time_limit: tiempo limite en segundos
+    :param until: instante limite, None para usar time_limit
+    :return: tiempo limite anterior, para volver a el con restore_limit
+    """
+    global deadline
+    previous = deadline
+    if until is not None:
+        deadline = until if deadline is None else min(deadline, until)
+    elif deadline is not None:
+        deadline = min(deadline, monotonic() + time_limit)
+    return previous
+
+
+def restore_limit(previous):
+    """
+    Funcion que vuelve al tiempo limite anterior a un limit
+
+    :param previous: tiempo limite que retorno limit
+    """
+    global deadline
+    deadline = previous
+
+
+def push_lift(lift, offset):
+    """
+    Funcion que indica que las siguientes soluciones publicadas son de un grafo reducido
+
+    :param lift: funcion que lleva una solucion del grafo reducido al grafo anterior
+    :param offset: cuantos nodos agrega lift al tamano de una solucion
+    """
+    global lifts
+    lifts = lifts + ((lift, offset),)
+
+
+def pop_lift():
+    """
+    Funcion que deshace el ultimo push_lift
+    """
+    global lifts
+    lifts = lifts[:-1]
+
+
+def publish(S, score=None):
+    """
+    Funcion que publica una solucion si es mejor que el incumbente actual
+
+    :param S: indices de los nodos de la solucion
+    :param score: valor de la solucion (mayor es mejor), por defecto su tamano
+    """
+    global incumbent
+    score = len(S) if score is None else score
+    score += sum(offset for _, offset in lifts)
+    if incumbent is None or score > incumbent[1]:
+        found_at = 0 if start_time is None else monotonic() - start_time
+        incumbent = (list(S), score, found_at, lifts)
+
+
+def best():
+    """
+    Funcion que retorna el incumbente de la ejecucion actual
+
+    :return: (solucion, valor, segundos desde start hasta que se encontro), o None si no se publico nada
+    """
+    global incumbent
+    if incumbent is None:
+        return None
+    S, score, found_at, pending = incumbent
+    if pending:
+        for lift, _ in reversed(pending):
+            S = lift(S)
+        incumbent = (S, score, found_at, ())
+    return S, score, found_at
@@ -0,0 +1,220 @@
+import multiprocessing
+import numpy as np
+import rustworkx as rx
+
+from .graph import mis_graph, graph_cache, induced_subgraph
+from .MIS_heuristic import MIS_heuristic
+from .MIS_exact import branch_and_bound
+from . import anytime
+
+# Tamano sugerido de las componentes que se resuelven de forma exacta (ver MIS_components), si se pide
+EXACT_COMPONENT_SIZE = 64
+
+# Estado de cada proceso de la descomposicion paralela (ver init_component_worker)
+component_graph = None
+component_nodes = None
+component_solver = None
+
+
+def connected_components(G):
+    """
+    Funcion que retorna las componentes conexas de G, de menor a mayor tamano. Se calculan una vez por grafo con
+    rustworkx.connected_components y se guardan en su cache
+
+    :param G: grafo G
+    :return: lista de arreglos ordenados con los nodos de cada componente
+    """
+    cache = graph_cache(G)
+    if "components" not in cache:
+        G = mis_graph(G)
+        P = rx.PyGraph()
+        P.add_nodes_from(range(len(G.active)))
+        P.add_edges_from_no_data(G.edge_list())
+        # Los indices que no son nodos de G quedan como componentes de un nodo y se descartan
+        components = [np.array(sorted(C), dtype=np.int64) for C in rx.connected_components(P)]
+        components = [C for C in components if G.active[C[0]]]
+        components.sort(key=len)
+        cache["components"] = components
+    return cache["components"]
+
+
+def solve_component(G, nodes, algorithm, args, share=1.0, exact_size=0):
+    """
+    Funcion que resuelve el MIS del subgrafo inducido por una componente: de forma exacta si tiene a lo sumo
+    exact_size nodos, si no con algorithm usando una parte del tiempo que queda
+
+    :param G: grafo G
+    :param nodes: arreglo ordenado de nodos de la componente
+    :param algorithm: funcion MIS_* para las componentes grandes
+    :param args: argumentos de algorithm despues del grafo
+    :param share: fraccion del tiempo que queda que puede usar algorithm
+    :param exact_size: tamano maximo de las componentes que se resuelven de forma exacta, 0 para ninguna
+    :return: lista de indices de G que conforman un conjunto independiente maximal de la componente
+    """
+    H = induced_subgraph(G, nodes)
+    if len(nodes) <= exact_size:
+        S = branch_and_bound(H)
+    else:
+        remaining = anytime.remaining()
+        previous = anytime.limit(share * remaining) if remaining is not None else None
+        try:
+            S = algorithm(H, *args)
+        finally:
+            if remaining is not None:
+                anytime.restore_limit(previous)
+    return nodes[np.asarray(S, dtype=np.int64)].tolist()
+
+
+def init_component_worker(G, components, algorithm, args, exact_size):
+    """
+    Inicializa un proceso de la descomposicion paralela guardando el grafo, sus componentes y el algoritmo
+
+    :param G: grafo G
+    :param components: componentes de G (ver connected_components)
+    :param algorithm: funcion MIS_* para las componentes grandes
+    :param args: argumentos de algorithm despues del grafo
+    :param exact_size: tamano maximo de las componentes que se resuelven de forma exacta
+    """
+    global component_graph, component_nodes, component_solver
+    component_graph = G
+    component_nodes = components
+    component_solver = (algorithm, args, exact_size)
+
+
+def component_task(task):
+    """
+    Resuelve una componente en un proceso de la descomposicion paralela (ver solve_component)
+
+    :param task: indice de la componente e instante limite (de monotonic) para resolverla, None si no hay
+    :return: indice de la componente y su solucion
+    """
+    i, until = task
+    algorithm, args, exact_size = component_solver
+    previous = anytime.limit(until=until)
+    try:
+        return i, solve_component(component_graph, component_nodes[i], algorithm, args, 1.0, exact_size)
+    finally:
+        anytime.restore_limit(previous)
+
+
+def component_deadlines(components, workers, exact_size):
+    """
+    Funcion que reparte el tiempo que queda entre los procesos de la descomposicion paralela. Las componentes
+    pequenas (que se resuelven de forma exacta) van primero con el tiempo limite de la ejecucion; las grandes se
+    asignan de mayor a menor al proceso que queda libre antes, con una duracion proporcional a su numero de nodos,
+    escalada para que el ultimo proceso termine justo en el tiempo limite. Asi es como las reparte Pool, pues cada
+    proceso toma la siguiente tarea al terminar la anterior
+
+    :param components: componentes de G, de menor a mayor tamano
+    :param workers: cantidad de procesos
+    :param exact_size: tamano maximo de las componentes que se resuelven de forma exacta
+    :return: lista de (indice de la componente, instante limite para resolverla) en el orden en que se resuelven
+    """
+    deadline = anytime.deadline
+    tasks = [(i, deadline) for i, C in enumerate(components) if len(C) <= exact_size]
+    large = [i for i in range(len(components) - 1, -1, -1) if len(components[i]) > exact_size]
+    loads = [0] * workers
+    ends = []
+    for i in large:
+        w = loads.index(min(loads))
+        loads[w] += len(components[i])
+        ends.append(loads[w])
+    if deadline is None:
+        return tasks + [(i, None) for i in large]
+    # Los nodos de la carga mas grande ocupan todo el tiempo que queda
+    makespan = max(loads)
+    seconds_per_node = anytime.remaining() / makespan if makespan else 0.0
+    return tasks + [(i, deadline - (makespan - end) * seconds_per_node) for i, end in zip(large, ends)]
+
+
+def combine(solutions, i=None, S=()):
+    """
+    Funcion que une las soluciones de las componentes, reemplazando opcionalmente la de una de ellas
+
+    :param solutions: lista con la solucion de cada componente
+    :param i: indice de la componente a reemplazar, None para no reemplazar
+    :param S: solucion que reemplaza a la de la componente i
+    :return: lista ordenada de indices de G
+    """
+    return sorted([v for j, T in enumerate(solutions) if j != i for v in T] + list(S))
+
+
+def MIS_components(G, algorithm, *args, workers=1, exact_size=0):
+    """
+    Funcion que resuelve el MIS de G por componentes conexas: el MIS de G es la union de los MIS de sus
+    componentes. Las componentes se resuelven con algorithm, en orden de menor a mayor o repartidas entre varios
+    procesos; opcionalmente las pequenas se resuelven de forma exacta. Cada componente parte de la solucion de la
+    heuristica, de modo que siempre se puede publicar una solucion de G.
+
+    :param G: grafo G
+    :param algorithm: funcion MIS_* para las componentes grandes, recibe el grafo y args
+    :param args: argumentos de algorithm despues del grafo
+    :param workers: cantidad de procesos que resuelven componentes en paralelo
+    :param exact_size: tamano maximo de las componentes que se resuelven de forma exacta (por ejemplo
+        EXACT_COMPONENT_SIZE), 0 para resolverlas todas con algorithm
+    :return: indices del grafo que conforman un conjunto independiente maximal
+    """
+    G = mis_graph(G)
+    components = connected_components(G)
+    if len(components) <= 1:
+        return algorithm(G, *args)
+
+    # Solucion inicial de cada componente: la heuristica sobre todo G, separada por componente
+    initial = np.zeros(len(G.active), dtype=bool)
+    initial[MIS_heuristic(G)] = True
+    solutions = [C[initial[C]].tolist() for C in components]
+    anytime.publish(combine(solutions))
+
+    def update(i, S):
+        if len(S) > len(solutions[i]):
+            solutions[i] = S
+            anytime.publish(combine(solutions))
+
+    # El tiempo se reparte entre las componentes grandes en proporcion a su numero de nodos
+    large = sum(len(C) for C in components if len(C) > exact_size)
+
+    # Un proceso daemon, como los de un multiprocessing.Pool (por ejemplo el de otra descomposicion), no puede
+    # crear procesos; en ese caso las componentes se resuelven en este proceso
+    if workers > 1 and not multiprocessing.current_process().daemon:
+        pool = multiprocessing.Pool(workers, initializer=init_component_worker,
+                                    initargs=(G, components, algorithm, args, exact_size))
+        # El instante limite de cada componente se calcula aqui y viaja con la tarea, de modo que los procesos no
+        # dependen del tiempo que quede al empezar cada una ni del tiempo limite que heredan
+        try:
+            for i, S in pool.imap_unordered(component_task, component_deadlines(components, workers, exact_size)):
+                update(i, S)
+        finally:
+            pool.terminate()
+    else:
+        for i, C in enumerate(components):
+            # Las soluciones que publica el algoritmo son de la componente; se llevan a G junto con las demas
+            offset = sum(len(T) for j, T in enumerate(solutions) if j != i)
+            anytime.push_lift(lambda S, i=i, C=C: combine(solutions, i, C[np.asarray(S, dtype=np.int64)].tolist()),
+                              offset)
+            try:
+                # Cada componente grande usa su proporcion del tiempo que queda; si una termina antes, el tiempo
+                # que no uso queda para las siguientes
+                S = solve_component(G, C, algorithm, args, len(C) / max(large, 1), exact_size)
+            finally:
+                anytime.pop_lift()
+            update(i, S)
+            if len(C) > exact_size:
+                large -= len(C)
+
+    return combine(solutions)
+
+
+def decomposed(algorithm, workers=1, exact_size=0):
+    """
+    Funcion que retorna una version de un algoritmo de MIS que resuelve cada componente conexa por separado
+    (ver MIS_components), con el mismo nombre
+
+    :param algorithm: funcion MIS_* a ejecutar, recibe el grafo y sus argumentos
+    :param workers: cantidad de procesos que resuelven componentes en paralelo
+    :param exact_size: tamano maximo de las componentes que se resuelven de forma exacta, 0 para ninguna
+    :return: funcion que recibe el grafo y los argumentos de algorithm
+    """
+    def solve(G, *args):
+        return MIS_components(G, algorithm, *args, workers=workers, exact_size=exact_size)
+    solve.__name__ = algorithm.__name__
+    return solve
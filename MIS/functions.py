@@ -1,8 +1,16 @@
+import os
+import csv
 import time
+import random
 import datetime
+import multiprocessing
+import multiprocessing.connection
+import numpy as np
 import rustworkx as rx
 import pandas as pd
 from os import walk
+from time import monotonic
+from collections import OrderedDict, deque
 
 from .MIS_exact import MIS_exact
 from .MIS_heuristic import MIS_heuristic
@@ -16,10 +24,22 @@ from .MIS_ACO import MIS_ACO
 from .MIS_memetic import MIS_memetic
 from .MIS_memetic import MIS_scatter_search
 from .MIS_wizard_search import MIS_wizard_search_material_pouch
+from .graph import graph_cache_path, save_cache
+from .reduce import reduced
+from .decompose import decomposed, EXACT_COMPONENT_SIZE
+from .validation import is_MIS, check_solution
+from . import anytime
 
 import signal
 
 
+# Segundos extra que se le dan a un algoritmo para terminar por si solo despues de su tiempo limite
+ANYTIME_GRACE_TIME = 5
+
+# Segundos extra que se le dan a un trabajo del benchmark paralelo antes de matar su proceso
+PARALLEL_GRACE_TIME = 60
+
+
 class TimeoutException(Exception):   # Custom exception class
     pass
 
@@ -47,52 +67,54 @@ def timer(func, *args):
 
 def timeout(time, func, *args):
     """
-    Funcion que dada otra funcion de calculo de MIS determina si se excedio a un limite de tiempo dado o tuvo otro error
+    Funcion que dada otra funcion de calculo de MIS determina si se excedio a un limite de tiempo dado o tuvo otro error.
+    La funcion recibe el tiempo limite por medio de anytime y deberia terminar sola retornando su mejor solucion;
+    si no lo hace, SIGALRM la interrumpe ANYTIME_GRACE_TIME segundos despues y se usa la ultima solucion que publico.
 
-    :param G: grafo dado
     :param time: timepo limite
-    :param funcName: nombre de la funcion a ejecutar
     :param func: funcion a ejecutar
-    :param *args: argumentos de func
-    :return: Si func finalizó antes del maximo tiempo de ejecución retorna la respuesta, de lo contrario retorna un conjunto vacío. Retorna en todo caso el tiempo de ejecución
+    :param *args: argumentos de func, el primero es el grafo
+    :return: La respuesta de func, o la mejor solucion que publico si se excedio el tiempo o fallo, su tamano, si es MIS,
+    el tiempo de ejecución, el tiempo en que se encontro la solucion y una advertencia
     """
-    signal.alarm(time)
+    anytime.start(time)
+    signal.alarm(time + ANYTIME_GRACE_TIME)
     try:
         res, duration = timer(func, *args)
     except TimeoutException:
         print(
             "---- {funcName} -> Max Time ({time} s) Exceeded".format(funcName=func.__name__, time=time))
-        return set(), 0, False, time, "TIMEOUT"
+        res, duration, warning = None, time, "TIMEOUT"
     except Exception as e:
         print(
             "---- {funcName} -> Something went wrong: {error}".format(funcName=func.__name__, error=e))
-        return set(), 0, False, time, e
+        res, duration, warning = None, time, e
     else:
-        # Reset the alarm
+        warning = "TIMEOUT" if anytime.expired() else ""
+    finally:
+        # Reset the alarm, tambien si func fallo, para que no salte durante la siguiente ejecucion
         signal.alarm(0)
-        # print results
-        is_mis = is_MIS(args[0], res)
-        print("---- {funcName} -> MIS size: {misSize} MIS: {mis} isMIS: {isMIS} -> Execution time: {duration}".format(
-            funcName=func.__name__, misSize=len(res), mis=res, isMIS=is_mis, duration=duration))
+        anytime.stop()
 
-        return res, len(res), is_mis, duration, ""
+    # Si func no retorno se usa su incumbente. El tiempo en que se encontro la solucion es el del incumbente
+    # si este es tan bueno como la respuesta, si no el tiempo total
+    incumbent = anytime.best()
+    if res is None:
+        res = [] if incumbent is None else incumbent[0]
+    found = duration
+    if incumbent is not None and len(incumbent[0]) >= len(res):
+        found = incumbent[2]
 
+    # print results
+    conflicts, uncovered = check_solution(args[0], res)
+    is_mis = len(conflicts) == 0 and len(uncovered) == 0
+    print("---- {funcName} -> MIS size: {misSize} MIS: {mis} isMIS: {isMIS} -> Execution time: {duration} Found at: {found}".format(
+        funcName=func.__name__, misSize=len(res), mis=res, isMIS=is_mis, duration=duration, found=found))
+    if not is_mis:
+        print("---- {funcName} -> Conflicting edges: {conflicts} Uncovered nodes: {uncovered}".format(
+            funcName=func.__name__, conflicts=conflicts.tolist(), uncovered=uncovered.tolist()))
 
-def is_MIS(G, S):
-    """
-    Funcion que recibe un grafo G y un conjunto S de indices de nodos y determina si S es un conjunto independiente maximal
-
-    :param G: grafo dado
-    :param S: posible conjunto independiente maximal de G
-    :return: true si S es MIS para G, false si no
-    """
-    for node in S:
-        if any((neighbor in S) for neighbor in G.neighbors(node)):
-            return False
-    for node in G.node_indices():
-        if node not in S and not any((neighbor in S) for neighbor in G.neighbors(node)):
-            return False
-    return True
+    return res, len(res), is_mis, duration, found, warning
 
 
 def randomGraph(n, e):
@@ -112,26 +134,68 @@ def randomGraph(n, e):
     return G
 
 
-def load_graph(filename):
+def parse_dimacs(filename):
+    """
+    Funcion que lee un archivo en formato DIMACS y retorna sus lados como un arreglo de NumPy
+
+    :param filename: nombre/path del archivo
+    :return: numero de nodos y arreglo (m, 2) con los lados (indices desde 0)
+    """
+    n = 0
+    with open(filename) as f:
+        lines = f.read().splitlines()
+
+    for line in lines:
+        if line[:1] == "p":
+            n = int(line.split()[2])
+            break
+
+    # Todos los lados se convierten de una sola vez en lugar de linea por linea
+    edge_tokens = " ".join(line[1:] for line in lines if line[:1] == "e").split()
+    edges = np.array(edge_tokens, dtype=np.int32).reshape(-1, 2) - 1
+
+    return n, edges
+
+
+def load_edges(filename, use_cache=True):
+    """
+    Funcion que carga los lados de un grafo en formato DIMACS usando el cache binario si existe.
+    El cache guarda en la primera fila (n, m) y en el resto los lados, y se abre con memory-map.
+
+    :param filename: nombre/path del archivo
+    :param use_cache: si se lee/escribe el cache binario
+    :return: numero de nodos y arreglo (m, 2) con los lados (indices desde 0)
+    """
+    if not use_cache:
+        return parse_dimacs(filename)
+
+    cache_path = graph_cache_path(filename)
+    if os.path.exists(cache_path):
+        data = np.load(cache_path, mmap_mode="r")
+        return int(data[0, 0]), data[1:]
+
+    n, edges = parse_dimacs(filename)
+    save_cache(cache_path, np.vstack((np.array([[n, len(edges)]], dtype=np.int32), edges)))
+
+    return n, edges
+
+
+def load_graph(filename, use_cache=True):
     """
     Funcion que carga un grafo en formato DIMACS dado el nombre de un archivo
 
     :param filename: nombre/path del archivo
+    :param use_cache: si se lee/escribe el cache binario del grafo
     :return: grafo cargado
     """
-    G = rx.PyGraph()
+    n, edges = load_edges(filename, use_cache)
 
-    with open(filename) as f:
-        for _line in f:
-            line = _line.rstrip()
-            tokens = line.split()
-
-            if tokens[0] == "p":
-                G.add_nodes_from(list(range(int(tokens[2]))))
-            if tokens[0] == "e":
-                nodef, nodet = int(tokens[1]) - 1, int(tokens[2]) - 1
-                nodes = set(G.nodes())
-                G.add_edge(nodef, nodet, 0)
+    # Si se usa cache, se recuerda de que archivo viene el grafo para que los algoritmos puedan guardar
+    # sus propios caches en disco junto a el (ver graph.cached_array)
+    attrs = {"filename": filename, "size": (n, len(edges))} if use_cache else None
+    G = rx.PyGraph(attrs=attrs)
+    G.add_nodes_from(list(range(n)))
+    G.add_edges_from_no_data(list(zip(*edges.T.tolist())))
 
     return G
 
@@ -149,11 +213,267 @@ def print_test_result(funcName, mis, isMis, duration):
         funcName=funcName, misSize=len(mis), mis=mis, isMIS=isMis, duration=duration))
 
 
-def test_benchmark(time, project_part=1):
+def MIS_heuristic_local_search(G):
+    """
+    Funcion que ejecuta la busqueda local sobre el resultado de la heuristica, como en el primer corte
+
+    :param G: grafo G
+    :return: indices del grafo que conforman un conjunto independiente maximal
+    """
+    S = MIS_heuristic(G)
+    return MIS_local_search(G, S, len(S) - 1)
+
+
+# Algoritmos que se ejecutan en cada corte del proyecto: (nombre, funcion, argumentos despues del grafo)
+BENCHMARK_ALGORITHMS = {
+    1: [("exact", MIS_exact, ()),
+        ("heuristic", MIS_heuristic, ()),
+        ("local search", MIS_heuristic_local_search, ())],
+    2: [("ils", MIS_ILS, ()),
+        ("tabu", MIS_tabu_search, ()),
+        ("sa", MIS_simulated_annealing, ()),
+        ("grasp", MIS_GRASP, ()),
+        ("genetic", MIS_genetic, (500, 10, 500))],
+    3: [("memetic", MIS_memetic, (75, 5, 150)),
+        ("SS", MIS_scatter_search, (10, 10, 10, 100)),
+        ("aco1", MIS_ACO, ()),
+        ("aco2", MIS_ACO, (10, 50, 0.2, 0.8, 0.3, 1))],
+    4: [("wizard_material_pouch", MIS_wizard_search_material_pouch, (100, 10, 80, 10, 10, 150))],
+}
+
+# Filas de BENCHMARK_ALGORITHMS que test_benchmark ejecuta sobre los archivos del benchmark, en los cortes en que no
+# son todas: el exacto no termina en los grafos densos y en el tercer corte solo se compara SS
+BENCHMARK_FILE_ALGORITHMS = {
+    1: ["heuristic", "local search"],
+    3: ["SS"],
+}
+
+
+def benchmark_algorithms(project_part, reduce=False, components=False, exact_components=False, component_workers=1,
+                         names=None):
+    """
+    Funcion que retorna los algoritmos que se ejecutan en un corte del proyecto. Las filas de BENCHMARK_ALGORITHMS
+    se mantienen tal cual, para que sus resultados se puedan comparar con los anteriores; opcionalmente se agrega
+    por cada algoritmo una fila con cada variante pedida:
+    - "<nombre>+reduce": se ejecuta sobre el kernel del grafo (ver reduce.MIS_reduced)
+    - "<nombre>+components": se ejecuta sobre cada componente conexa (ver decompose.MIS_components)
+    - "<nombre>+components+exact": igual, pero las componentes de a lo sumo EXACT_COMPONENT_SIZE nodos se
+      resuelven de forma exacta
+    El exacto no tiene variantes, ya reduce el grafo por si mismo.
+
+    :param project_part: corte del proyecto
+    :param reduce: si se agregan las filas que resuelven el kernel
+    :param components: si se agregan las filas que resuelven cada componente con el algoritmo
+    :param exact_components: si se agregan las filas que resuelven las componentes pequenas de forma exacta
+    :param component_workers: cantidad de procesos que resuelven componentes en paralelo
+    :param names: nombres de las filas de BENCHMARK_ALGORITHMS que se ejecutan (con sus variantes), None para todas
+    :return: lista de (nombre, funcion, argumentos despues del grafo)
+    """
+    variants = []
+    if reduce:
+        variants.append(("+reduce", reduced))
+    if components:
+        variants.append(("+components", lambda func: decomposed(func, component_workers)))
+    if exact_components:
+        variants.append(("+components+exact",
+                         lambda func: decomposed(func, component_workers, EXACT_COMPONENT_SIZE)))
+
+    rows = [row for row in BENCHMARK_ALGORITHMS[project_part] if names is None or row[0] in names]
+    algorithms = list(rows)
+    for suffix, variant in variants:
+        algorithms += [(name + suffix, variant(func), args) for name, func, args in rows if func is not MIS_exact]
+    return algorithms
+
+
+def results_suffix(reduce=False, components=False, exact_components=False, component_workers=1):
+    """
+    :param reduce: si se agregaron las filas que resuelven el kernel
+    :param components: si se agregaron las filas que resuelven cada componente
+    :param exact_components: si se agregaron las filas que resuelven las componentes pequenas de forma exacta
+    :param component_workers: cantidad de procesos que resuelven componentes en paralelo
+    :return: sufijo del archivo de resultados, para no sobrescribir los resultados sin las filas opcionales
+    """
+    suffix = "_reduce" if reduce else ""
+    suffix += "_components" if components else ""
+    suffix += "_exact" if exact_components else ""
+    return suffix
+
+
+def benchmark_worker(tasks, results):
+    """
+    Proceso del benchmark paralelo. Ejecuta los trabajos que recibe por tasks con su propio tiempo limite y
+    envia cada resultado por results apenas termina. Los ultimos grafos cargados se reutilizan entre trabajos.
+
+    :param tasks: cola de trabajos (job_id, filename, project_part, options, algorithm, seed, time), donde options
+        son los argumentos de benchmark_algorithms. None para terminar
+    :param results: extremo de escritura del pipe propio del proceso, por el que se envia cada resultado
+        (job_id, resultado, tamano, is_mis, tiempo, tiempo encontrado, warning)
+    """
+    # Grupo de procesos propio, para que al matar este proceso tambien se maten los que crea (por ejemplo, los de
+    # la descomposicion en componentes)
+    os.setpgrp()
+    graphs = OrderedDict()
+    for job_id, filename, project_part, options, algorithm, seed, time in iter(tasks.get, None):
+        if filename not in graphs:
+            graphs[filename] = load_graph(filename)
+            if len(graphs) > 2:
+                graphs.popitem(last=False)
+        graph = graphs[filename]
+
+        name, func, args = benchmark_algorithms(project_part, **options)[algorithm]
+        random.seed(seed)
+        np.random.seed(seed)
+        res, size, is_mis, duration, found, warning = timeout(time, func, graph, *args)
+        results.send((job_id, sorted(res), size, is_mis, duration, found, str(warning)))
+
+
+def test_benchmark_parallel(time, project_part=1, workers=None, seeds=1, **options):
+    """
+    Funcion para testear todos los files del benchmark repartiendo los trabajos (instancia, algoritmo, semilla)
+    entre varios procesos. Cada trabajo tiene su propio tiempo limite; si su proceso no responde pasados
+    PARALLEL_GRACE_TIME segundos extra se mata y se reemplaza. Cada resultado se escribe en el CSV al terminar.
+
+    :param time: tiempo maximo para ejecutar una funcion
+    :param project_part: corte del proyecto cuyos algoritmos se ejecutan
+    :param workers: numero de procesos, por defecto el numero de CPUs
+    :param seeds: numero de semillas con las que se ejecuta cada algoritmo
+    :param options: filas opcionales del benchmark, argumentos de benchmark_algorithms (reduce, components, etc.)
+    """
+    dirname = "benchmark"
+    filenames = next(walk(dirname), (None, None, []))[2]
+    # Las instancias mas grandes primero, para que los trabajos mas largos no queden al final
+    filenames.sort(key=lambda filename: os.path.getsize(os.path.join(dirname, filename)), reverse=True)
+    algorithms = benchmark_algorithms(project_part, **options)
+
+    jobs = [(filename, algorithm, seed) for filename in filenames
+            for algorithm in range(len(algorithms)) for seed in range(seeds)]
+    pending = deque(enumerate(jobs))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+
+    context = multiprocessing.get_context()
+
+    def start_worker():
+        # Cada proceso tiene su propio pipe de resultados, de modo que matarlo no puede dejar a medio escribir
+        # un canal que usen los demas. No son daemon para que puedan crear procesos (ver decompose.MIS_components)
+        tasks = context.Queue()
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=benchmark_worker, args=(tasks, sender))
+        process.start()
+        sender.close()
+        # [proceso, cola de trabajos, job_id en ejecucion, hora limite, pipe de resultados]
+        return [process, tasks, None, None, receiver]
+
+    def stop_worker(worker):
+        # Se mata el grupo del proceso (ver benchmark_worker); si todavia no lo creo, solo el proceso
+        try:
+            os.killpg(worker[0].pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        worker[0].kill()
+        worker[0].join()
+        worker[4].close()
+
+    sizes = {}
+
+    def graph_size(filename):
+        if filename not in sizes:
+            n, edges = load_edges(os.path.join(dirname, filename))
+            sizes[filename] = (n, len(edges))
+        return sizes[filename]
+
+    print("---------TESTS---------")
+    with open("res/{project_part}_corte_res_{time}min_paralelo{suffix}.csv".format(
+            project_part=project_part, time=time // 60, suffix=results_suffix(**options)), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["File", "n", "e", "Algorithm", "Seed",
+                         "Result", "Size Result", "Is MIS", "Time", "Time Found", "Warnings"])
+
+        def write_row(job_id, res, size, is_mis, duration, found, warning):
+            filename, algorithm, seed = jobs[job_id]
+            n, e = graph_size(filename)
+            writer.writerow([filename, n, e, algorithms[algorithm][0], seed,
+                             res, size, is_mis, duration, found, warning])
+            f.flush()
+
+        pool = [start_worker() for _ in range(workers)]
+        try:
+            finished = 0
+            while finished < len(jobs):
+                # Se asigna un trabajo a cada proceso libre
+                for worker in pool:
+                    if worker[2] is None and pending:
+                        job_id, (filename, algorithm, seed) = pending.popleft()
+                        worker[1].put((job_id, os.path.join(dirname, filename), project_part, options,
+                                       algorithm, seed, time))
+                        worker[2] = job_id
+                        worker[3] = monotonic() + time + PARALLEL_GRACE_TIME
+
+                busy = [worker[4] for worker in pool if worker[2] is not None]
+                ready = multiprocessing.connection.wait(busy, timeout=1)
+                for i, worker in enumerate(pool):
+                    if worker[4] not in ready:
+                        continue
+                    try:
+                        job_id, res, size, is_mis, duration, found, warning = worker[4].recv()
+                    except EOFError:
+                        # El proceso murio sin enviar su resultado
+                        print("---- {algorithm} -> Worker died".format(algorithm=algorithms[jobs[worker[2]][1]][0]))
+                        write_row(worker[2], [], 0, False, time, time, "WORKER DIED")
+                        stop_worker(worker)
+                        pool[i] = start_worker()
+                    else:
+                        write_row(job_id, res, size, is_mis, duration, found, warning)
+                        worker[2] = None
+                    finished += 1
+
+                # Los procesos que se pasaron del tiempo (por ejemplo, atascados fuera de Python) se matan
+                for i, worker in enumerate(pool):
+                    if worker[2] is not None and monotonic() > worker[3]:
+                        stop_worker(worker)
+                        print("---- {algorithm} -> Worker killed after {time} s".format(
+                            algorithm=algorithms[jobs[worker[2]][1]][0], time=time + PARALLEL_GRACE_TIME))
+                        write_row(worker[2], [], 0, False, time, time, "TIMEOUT")
+                        finished += 1
+                        pool[i] = start_worker()
+
+            for worker in pool:
+                worker[1].put(None)
+            for worker in pool:
+                worker[0].join()
+                worker[4].close()
+        finally:
+            # Si el benchmark se interrumpe, los procesos que siguen vivos se matan para que no queden corriendo
+            for worker in pool:
+                if worker[0].is_alive():
+                    stop_worker(worker)
+
+
+def run_algorithms(graph, time, project_part, **options):
+    """
+    Funcion que ejecuta sobre un grafo todos los algoritmos de un corte del proyecto, cada uno con tiempo limite
+
+    :param graph: grafo dado
+    :param time: tiempo maximo para ejecutar una funcion
+    :param project_part: corte del proyecto cuyos algoritmos se ejecutan
+    :param options: filas opcionales del benchmark, argumentos de benchmark_algorithms (reduce, components, etc.)
+    :return: nombres de los algoritmos y fila de resultados (Result, Size Result, Is MIS, Time, Time Found, Warnings)
+    """
+    index = []
+    results = []
+    for name, func, args in benchmark_algorithms(project_part, **options):
+        index.append(name)
+        results.append(timeout(time, func, graph, *args))
+    # Se agrupan los resultados por columna: primero todos los Result, luego todos los Size Result, etc.
+    return index, [list(column) for column in zip(*results)]
+
+
+def test_benchmark(time, project_part=1, **options):
     """
-    Funcion para testear todos los files del benchmark para el primer corte
+    Funcion para testear todos los files del benchmark para el primer corte. En los cortes de
+    BENCHMARK_FILE_ALGORITHMS solo se ejecutan esas filas
 
     :param time: tiempo maximo para ejecutar una funcion
+    :param options: filas opcionales del benchmark, argumentos de benchmark_algorithms (reduce, components, etc.)
     """
     dirname = "benchmark"
     filenames = next(walk(dirname), (None, None, []))[2]
@@ -162,7 +482,7 @@ def test_benchmark(time, project_part=1):
 
     data = []
     indexes = []
-    columns = ["Result", "Size Result", "Is MIS", "Time", "Warnings"]
+    columns = ["Result", "Size Result", "Is MIS", "Time", "Time Found", "Warnings"]
     for filename in filenames:
         graph = load_graph(
             "{dirname}/{filename}".format(dirname=dirname, filename=filename))
@@ -173,81 +493,15 @@ def test_benchmark(time, project_part=1):
         indexes.append("{filename} n={n} e={e}".format(
             filename=filename, n=graph.num_nodes(), e=graph.num_edges()))
 
-        if (project_part == 1):
-            # exact_res, size_exact_res, is_mis_exact_res, exact_duration, exact_warning = timeout(
-            #     time, MIS_exact, graph)
-            heuristic_res, size_heuristic_res, is_mis_heuristic_res, heuristic_duration, heuristic_warning = timeout(
-                time, MIS_heuristic, graph)
-            local_search_res, size_local_search_res, is_mis_local_search_res, local_search_duration, local_search_warning = timeout(
-                time, MIS_local_search, graph, heuristic_res, len(heuristic_res) - 1)
-
-            # index = ["exact", "heuristic", "local search"]
-            # times = [exact_duration, heuristic_duration, local_search_duration]
-            # result = [exact_res, heuristic_res, local_search_res]
-            # is_mis_result = [is_mis_exact_res,
-            #                  is_mis_heuristic_res, is_mis_local_search_res]
-            # result_size = [size_exact_res,
-            #                size_heuristic_res, size_local_search_res]
-            # warnings = [exact_warning, heuristic_warning, local_search_warning]
-
-        elif (project_part == 2):
-            ils_res, size_ils_res, is_mis_ils_res, ils_duration, ils_warning = timeout(
-                time, MIS_ILS, graph)
-            tabu_res, size_tabu_res, is_mis_tabu_res, tabu_duration, tabu_warning = timeout(
-                time, MIS_tabu_search, graph)
-            sa_res, size_sa_res, is_mis_sa_res, sa_duration, sa_warning = timeout(
-                time, MIS_simulated_annealing, graph)
-            grasp_res, size_grasp_res, is_mis_grasp_res, grasp_duration, grasp_warning = timeout(
-                time, MIS_GRASP, graph)
-            genetic_res, size_genetic_res, is_mis_genetic_res, genetic_duration, genetic_warning = timeout(
-                time, MIS_genetic, graph, 500, 10, 500)
-
-            index = ["ils", "tabu", "sa", "grasp", "genetic"]
-            times = [ils_duration, tabu_duration,
-                     sa_duration, grasp_duration, genetic_duration]
-            result = [ils_res, tabu_res, sa_res, grasp_res, genetic_res]
-            is_mis_result = [is_mis_ils_res, is_mis_tabu_res,
-                             is_mis_sa_res, is_mis_grasp_res, is_mis_genetic_res]
-            result_size = [size_ils_res, size_tabu_res,
-                           size_sa_res, size_grasp_res, size_genetic_res]
-            warnings = [ils_warning, tabu_warning,
-                        sa_warning, grasp_warning, genetic_warning]
-        elif (project_part == 3):
-            # aco1_res, size_aco1_res, is_mis_aco1_res, aco1_duration, aco1_warning = timeout(
-            #     time, MIS_ACO, graph)
-
-            # aco2_res, size_aco2_res, is_mis_aco2_res, aco2_duration, aco2_warning = timeout(
-            #     time, MIS_ACO, graph, 10, 50, 0.2, 0.8, 0.3, 1)
-            
-            # memetic_res, size_memetic_res, is_mis_memetic_res, memetic_duration, memetic_warning = timeout(time, MIS_memetic, graph, 75, 5, 150)
-
-            SS_res, size_SS_res, is_mis_SS_res, SS_duration, SS_warning = timeout(time, MIS_scatter_search, graph, 10, 10, 10, 100)
-            
-            # index = ["memetic", "SS", "aco1", "aco2"]
-            # times = [memetic_duration, SS_duration, aco1_duration, aco2_duration]
-            # result = [memetic_res, SS_res, aco1_res, aco2_res]
-            # is_mis_result = [is_mis_memetic_res, is_mis_SS_res, is_mis_aco1_res, is_mis_aco2_res]
-            # result_size = [size_memetic_res, size_SS_res, size_aco1_res, size_aco2_res]
-            # warnings = [memetic_warning, SS_warning, aco1_warning, aco2_warning]
-            
-        # 
-        else: 
-            wizard_mp_res, size_wizard_mp_res, is_mis_wizard_mp_res, wizard_mp_duration, wizard_mp_warning = timeout(
-                time, MIS_wizard_search_material_pouch, graph, 100, 10, 80, 10, 10, 150)
-
-            index = ["wizard_material_pouch"]
-            times = [wizard_mp_duration]
-            result = [wizard_mp_res]
-            is_mis_result = [is_mis_wizard_mp_res]
-            result_size = [size_wizard_mp_res]
-            warnings = [wizard_mp_warning]
+        index, columns_data = run_algorithms(graph, time, project_part,
+                                             names=BENCHMARK_FILE_ALGORITHMS.get(project_part), **options)
+        data.append(sum(columns_data, []))
 
         print("\n-----------------------")
-    data.append(result + result_size + is_mis_result + times + warnings)
     df = pd.DataFrame(data=data, index=indexes)
     df.columns = pd.MultiIndex.from_product([columns, index])
-    df.to_csv("res/{project_part}_corte_res_{time}min.csv".format(
-        project_part=project_part, time=time // 60))
+    df.to_csv("res/{project_part}_corte_res_{time}min{suffix}.csv".format(
+        project_part=project_part, time=time // 60, suffix=results_suffix(**options)))
 
 
 def load_cubical_graph():
@@ -309,18 +563,19 @@ def load_square_triangle_graph():
     return "SQUARE_TRIANGLE", G
 
 
-def test_defined_graphs(time, project_part=1):
+def test_defined_graphs(time, project_part=1, **options):
     """
     Funcion para testear algunos grafos definidos
 
     :param time: tiempo maximo para ejecutar una funcion
+    :param options: filas opcionales del benchmark, argumentos de benchmark_algorithms (reduce, components, etc.)
     """
 
     defined_graphs = [load_cubical_graph(), load_k3_graph(
     ), load_p3_graph(), load_square_triangle_graph()]
     data = []
     indexes = []
-    columns = ["Result", "Size Result", "Is MIS", "Time", "Warnings"]
+    columns = ["Result", "Size Result", "Is MIS", "Time", "Time Found", "Warnings"]
 
     print("---------TESTS---------")
     for graph_data in defined_graphs:
@@ -332,71 +587,11 @@ def test_defined_graphs(time, project_part=1):
         indexes.append("{graphName} n={n} e={e}".format(
             graphName=graph_data[0], n=graph.num_nodes(), e=graph.num_edges()))
 
-        if (project_part == 1):
-            exact_res, size_exact_res, is_mis_exact_res, exact_duration, exact_warning = timeout(
-                time, MIS_exact, graph)
-            heuristic_res, size_heuristic_res, is_mis_heuristic_res, heuristic_duration, heuristic_warning = timeout(
-                time, MIS_heuristic, graph)
-            local_search_res, size_local_search_res, is_mis_local_search_res, local_search_duration, local_search_warning = timeout(
-                time, MIS_local_search, graph, heuristic_res, len(heuristic_res) - 1)
-
-            index = ["exact", "heuristic", "local search"]
-            times = [exact_duration, heuristic_duration, local_search_duration]
-            result = [exact_res, heuristic_res, local_search_res]
-            is_mis_result = [is_mis_exact_res,
-                             is_mis_heuristic_res, is_mis_local_search_res]
-            result_size = [size_exact_res,
-                           size_heuristic_res, size_local_search_res]
-            warnings = [exact_warning, heuristic_warning, local_search_warning]
-
-        if (project_part == 2):
-            ils_res, size_ils_res, is_mis_ils_res, ils_duration, ils_warning = timeout(
-                time, MIS_ILS, graph)
-            tabu_res, size_tabu_res, is_mis_tabu_res, tabu_duration, tabu_warning = timeout(
-                time, MIS_tabu_search, graph)
-            sa_res, size_sa_res, is_mis_sa_res, sa_duration, sa_warning = timeout(
-                time, MIS_simulated_annealing, graph)
-            grasp_res, size_grasp_res, is_mis_grasp_res, grasp_duration, grasp_warning = timeout(
-                time, MIS_GRASP, graph)
-            genetic_res, size_genetic_res, is_mis_genetic_res, genetic_duration, genetic_warning = timeout(
-                time, MIS_genetic, graph, 500, 10, 500)
-
-            index = ["ils", "tabu", "sa", "grasp", "genetic"]
-            times = [ils_duration, tabu_duration,
-                     sa_duration, grasp_duration, genetic_duration]
-            result = [ils_res, tabu_res, sa_res, grasp_res, genetic_res]
-            is_mis_result = [is_mis_ils_res, is_mis_tabu_res,
-                             is_mis_sa_res, is_mis_grasp_res, is_mis_genetic_res]
-            result_size = [size_ils_res, size_tabu_res,
-                           size_sa_res, size_grasp_res, size_genetic_res]
-            warnings = [ils_warning, tabu_warning,
-                        sa_warning, grasp_warning, genetic_warning]
-            
-        if (project_part == 3):
-            
-            aco1_res, size_aco1_res, is_mis_aco1_res, aco1_duration, aco1_warning = timeout(
-                time, MIS_ACO, graph)
-
-            aco2_res, size_aco2_res, is_mis_aco2_res, aco2_duration, aco2_warning = timeout(
-                time, MIS_ACO, graph, 10, 50, 0.2, 0.8, 0.3, 1)
-            
-            memetic_res, size_memetic_res, is_mis_memetic_res, memetic_duration, memetic_warning = timeout(time, MIS_memetic, graph, 75, 5, 150)
-
-            SS_res, size_SS_res, is_mis_SS_res, SS_duration, SS_warning = timeout(time, MIS_scatter_search, graph, 10, 10, 10, 100)
-            
-            index = ["memetic", "SS", "aco1", "aco2"]
-            times = [memetic_duration, SS_duration, aco1_duration, aco2_duration]
-            result = [memetic_res, SS_res, aco1_res, aco2_res]
-            is_mis_result = [is_mis_memetic_res, is_mis_SS_res, is_mis_aco1_res, is_mis_aco2_res]
-            result_size = [size_memetic_res, size_SS_res, size_aco1_res, size_aco2_res]
-            warnings = [memetic_warning, SS_warning, aco1_warning, aco2_warning]
-            
-
-
-        data.append(result + result_size + is_mis_result + times + warnings)
+        index, columns_data = run_algorithms(graph, time, project_part, **options)
+        data.append(sum(columns_data, []))
 
         print("\n-----------------------")
     df = pd.DataFrame(data=data, index=indexes)
     df.columns = pd.MultiIndex.from_product([columns, index])
-    df.to_csv("res/{project_part}_corte_res_{time}min_grafos_definidos.csv".format(
-        project_part=project_part, time=time // 60))
+    df.to_csv("res/{project_part}_corte_res_{time}min_grafos_definidos{suffix}.csv".format(
+        project_part=project_part, time=time // 60, suffix=results_suffix(**options)))
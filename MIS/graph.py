@@ -0,0 +1,446 @@
+import os
+import re
+import hashlib
+import numpy as np
+from collections import OrderedDict
+
+# Cantidad maxima de grafos cuyas estructuras derivadas se mantienen en memoria
+GRAPH_CACHE_SIZE = 8
+
+# Cantidad maxima de vecindades a distancia 2 que se mantienen en memoria por grafo (ver two_hop_neighbors)
+TWO_HOP_CACHE_SIZE = 1024
+
+# Directorio (junto a cada archivo de grafo) donde se guardan los caches en disco
+GRAPH_CACHE_DIR = ".cache"
+
+graph_caches = OrderedDict()
+
+
+class MISGraph:
+    """
+    Grafo inmutable sobre el que trabajan los algoritmos de MIS, con la adyacencia en formato CSR: los vecinos de v
+    son indices[indptr[v]:indptr[v + 1]], ordenados. Los nodos conservan los indices del grafo original; active
+    indica que indices son nodos. Tiene los metodos de solo lectura de rustworkx.PyGraph que usan los algoritmos,
+    y guarda en cache las estructuras derivadas del grafo (ver graph_cache).
+    """
+
+    def __init__(self, indptr, indices, active=None, num_edges=None, attrs=None):
+        """
+        :param indptr: inicio de los vecinos de cada nodo en indices, con un elemento extra al final
+        :param indices: vecinos de todos los nodos, concatenados
+        :param active: mascara de indices que son nodos, por defecto todos
+        :param num_edges: numero de lados, por defecto el de la adyacencia
+        :param attrs: atributos del grafo (ver graph_file)
+        """
+        self.indptr = indptr
+        self.indices = indices
+        self.degrees = np.diff(indptr)
+        self.active = np.ones(len(self.degrees), dtype=bool) if active is None else active
+        self.nodes = np.flatnonzero(self.active)
+        if num_edges is None:
+            loops = np.count_nonzero(indices == np.repeat(np.arange(len(self.degrees)), self.degrees))
+            num_edges = (len(indices) + loops) // 2
+        self.edges = num_edges
+        self.attrs = attrs
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def num_nodes(self):
+        return len(self.nodes)
+
+    def num_edges(self):
+        return self.edges
+
+    def node_indices(self):
+        return self.nodes.tolist()
+
+    node_indexes = node_indices
+
+    def neighbors(self, v):
+        return self.indices[self.indptr[v]:self.indptr[v + 1]]
+
+    def degree(self, v):
+        return int(self.degrees[v])
+
+    def edge_list(self):
+        """
+        :return: lista de lados (u, v) con u <= v
+        """
+        sources = np.repeat(np.arange(len(self.degrees)), self.degrees)
+        forward = sources <= self.indices
+        return list(zip(sources[forward].tolist(), self.indices[forward].tolist()))
+
+    def bitset_rows(self):
+        """
+        Funcion que retorna la adyacencia como bitsets empaquetados: el bit u de la fila v (bit u % 8 del byte
+        u // 8, de mayor a menor) indica si u es vecino de v. Se calcula la primera vez que se pide
+
+        :return: matriz de uint8 con una fila por indice de nodo
+        """
+        if "bitset_rows" not in self.cache:
+            size = len(self.degrees)
+            rows = np.zeros((size, (size + 7) // 8), dtype=np.uint8)
+            sources = np.repeat(np.arange(size), self.degrees)
+            np.bitwise_or.at(rows, (sources, self.indices // 8), (0x80 >> (self.indices % 8)).astype(np.uint8))
+            self.cache["bitset_rows"] = rows
+        return self.cache["bitset_rows"]
+
+
+class ResidualGraph:
+    """
+    Vista reversible de un subgrafo inducido de un MISGraph: los nodos que siguen en el grafo se marcan en alive
+    y se mantiene el grado de cada nodo dentro del subgrafo. Sacar un nodo cuesta O(grado) y queda registrado en
+    una pila (trail), por lo que se puede volver a cualquier punto anterior deshaciendo los pasos en orden inverso.
+    Reemplaza a copiar el grafo y borrarle nodos: la misma vista se reutiliza en todas las construcciones.
+    """
+
+    def __init__(self, G, nodes=None):
+        """
+        :param G: grafo G
+        :param nodes: nodos del subgrafo inicial, por defecto todos los de G
+        """
+        self.graph = mis_graph(G)
+        self.adj = adjacency_lists(self.graph)
+        self.trail = []
+        if nodes is None:
+            self.alive = bytearray(self.graph.active.tobytes())
+            self.degree = self.graph.degrees.tolist()
+            self.size = len(self.graph)
+        else:
+            nodes = list(nodes)
+            self.alive = bytearray(len(self.adj))
+            for v in nodes:
+                self.alive[v] = 1
+            self.degree = [0] * len(self.adj)
+            for v in nodes:
+                self.degree[v] = sum(self.alive[u] for u in self.adj[v])
+            self.size = len(nodes)
+        # Estado inicial, para restaurar todo el subgrafo de una vez
+        self.initial = (bytes(self.alive), list(self.degree), self.size)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, v):
+        return self.alive[v] == 1
+
+    def nodes(self):
+        """
+        :return: lista de los nodos del subgrafo, de menor a mayor
+        """
+        alive = self.alive
+        return [v for v in self.graph.nodes.tolist() if alive[v]]
+
+    def neighbors(self, v):
+        """
+        :param v: nodo
+        :return: lista de los vecinos de v dentro del subgrafo
+        """
+        alive = self.alive
+        return [u for u in self.adj[v] if alive[u]]
+
+    def remove(self, v):
+        """
+        Funcion que saca el nodo v del subgrafo, bajando el grado de sus vecinos
+
+        :param v: nodo del subgrafo
+        """
+        alive, degree = self.alive, self.degree
+        alive[v] = 0
+        self.size -= 1
+        self.trail.append(v)
+        for u in self.adj[v]:
+            if alive[u]:
+                degree[u] -= 1
+
+    def mark(self):
+        """
+        :return: punto actual de la pila de pasos, para volver a el con restore
+        """
+        return len(self.trail)
+
+    def restore(self, mark=0):
+        """
+        Funcion que devuelve al subgrafo los nodos sacados despues del punto mark, en orden inverso. Volver al
+        inicio (mark = 0) copia el estado inicial en vez de deshacer cada paso
+
+        :param mark: punto de la pila de pasos (ver mark)
+        """
+        alive, degree, trail = self.alive, self.degree, self.trail
+        if mark == 0:
+            alive[:], degree[:], self.size = self.initial
+            trail.clear()
+            return
+        while len(trail) > mark:
+            v = trail.pop()
+            for u in self.adj[v]:
+                if alive[u]:
+                    degree[u] += 1
+            alive[v] = 1
+            self.size += 1
+
+
+def from_pygraph(G):
+    """
+    Funcion que convierte un rustworkx.PyGraph en MISGraph. Los lados repetidos se juntan, como en G.neighbors
+
+    :param G: grafo G
+    :return: MISGraph con los mismos indices de nodos y los mismos atributos
+    """
+    nodes = np.asarray(G.node_indices(), dtype=np.int64)
+    size = int(nodes.max()) + 1 if len(nodes) > 0 else 0
+    edges = np.asarray(G.edge_list(), dtype=np.int64).reshape(-1, 2)
+
+    # Cada lado va en ambas direcciones, ordenados por nodo de origen y luego por vecino, sin repetidos
+    keys = np.sort(np.concatenate((edges[:, 0] * size + edges[:, 1], edges[:, 1] * size + edges[:, 0])))
+    keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) > 0 else keys
+    sources, indices = keys // max(size, 1), keys % max(size, 1)
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(sources, minlength=size))
+
+    active = np.zeros(size, dtype=bool)
+    active[nodes] = True
+    return MISGraph(indptr, indices, active, G.num_edges(), G.attrs)
+
+
+def mis_graph(G):
+    """
+    Funcion que retorna la version MISGraph de G. La conversion de un PyGraph se hace una sola vez: se guarda
+    con una referencia a G para que su id no se reutilice mientras exista, y la clave incluye el numero de nodos
+    y lados para no usar una conversion vieja si G fue modificado.
+
+    :param G: grafo G, PyGraph o MISGraph
+    :return: MISGraph de G
+    """
+    if isinstance(G, MISGraph):
+        return G
+    key = (id(G), G.num_nodes(), G.num_edges())
+    entry = graph_caches.get(key)
+    if entry is None:
+        entry = (G, from_pygraph(G))
+        graph_caches[key] = entry
+        if len(graph_caches) > GRAPH_CACHE_SIZE:
+            graph_caches.popitem(last=False)
+    else:
+        graph_caches.move_to_end(key)
+    return entry[1]
+
+
+def graph_cache(G):
+    """
+    Funcion que retorna el diccionario de estructuras derivadas de G (listas de adyacencia, indices, etc.),
+    que se guarda en su MISGraph
+
+    :param G: grafo G, PyGraph o MISGraph
+    :return: diccionario de estructuras derivadas de G
+    """
+    return mis_graph(G).cache
+
+
+def graph_cache_path(filename, suffix="npy"):
+    """
+    Funcion que calcula la ruta de un cache en disco de un archivo de grafo. La clave del cache depende de
+    la ruta, el tamano y la fecha de modificacion del archivo, por lo que editarlo invalida el cache.
+
+    :param filename: nombre/path del archivo
+    :param suffix: extension que identifica el contenido del cache
+    :return: path del archivo del cache
+    """
+    stat = os.stat(filename)
+    path = os.path.realpath(filename)
+    key = hashlib.sha1("{path}:{size}:{mtime}".format(
+        path=path, size=stat.st_size, mtime=stat.st_mtime_ns).encode()).hexdigest()[:16]
+    dirname, basename = os.path.split(path)
+    return os.path.join(dirname, GRAPH_CACHE_DIR, "{basename}.{key}.{suffix}".format(
+        basename=basename, key=key, suffix=suffix))
+
+
+def save_cache(cache_path, data):
+    """
+    Funcion que guarda un arreglo en un cache en disco. Se escribe en un archivo temporal y se renombra para que
+    otro proceso nunca lea un cache a medias, y se borran las versiones anteriores del mismo cache (mismo archivo
+    y extension, otra clave). Los errores de escritura se ignoran: el cache es solo una optimizacion.
+
+    :param cache_path: path del cache, calculado con graph_cache_path
+    :param data: arreglo a guardar
+    """
+    try:
+        cache_dir, name = os.path.split(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        # name es "<archivo>.<clave de 16 caracteres hexadecimales>.<extension>"
+        prefix, suffix = re.fullmatch(r"(.*\.)[0-9a-f]{16}(\..*)", name).groups()
+        old_version = re.compile(re.escape(prefix) + r"[0-9a-f]{16}" + re.escape(suffix))
+        for old in os.listdir(cache_dir):
+            if old != name and old_version.fullmatch(old):
+                os.remove(os.path.join(cache_dir, old))
+        tmp_path = "{cache_path}.{pid}.tmp".format(cache_path=cache_path, pid=os.getpid())
+        with open(tmp_path, "wb") as f:
+            np.save(f, data)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
+def graph_file(G):
+    """
+    Funcion que retorna el archivo del que se cargo G con load_graph. Las copias de G comparten sus atributos,
+    por lo que solo se acepta si G tiene aun el mismo numero de nodos y lados que al cargarlo
+
+    :param G: grafo G
+    :return: nombre/path del archivo, o None si G no se cargo de un archivo o fue modificado
+    """
+    attrs = G.attrs
+    if isinstance(attrs, dict) and attrs.get("size") == (G.num_nodes(), G.num_edges()):
+        return attrs.get("filename")
+    return None
+
+
+def cached_array(G, name, compute):
+    """
+    Funcion que retorna un arreglo derivado de G, calculandolo solo si no esta en el cache en memoria del grafo
+    ni, si G se cargo de un archivo, en el cache en disco junto a ese archivo
+
+    :param G: grafo G
+    :param name: nombre del arreglo, se usa como extension del cache en disco
+    :param compute: funcion que recibe G y calcula el arreglo
+    :return: arreglo derivado de G
+    """
+    cache = graph_cache(G)
+    if name not in cache:
+        filename = graph_file(G)
+        cache_path = None
+        if filename is not None and os.path.exists(filename):
+            cache_path = graph_cache_path(filename, name + ".npy")
+        if cache_path is not None and os.path.exists(cache_path):
+            cache[name] = np.load(cache_path)
+        else:
+            cache[name] = compute(G)
+            if cache_path is not None:
+                save_cache(cache_path, cache[name])
+    return cache[name]
+
+
+def adjacency_lists(G):
+    """
+    Funcion que retorna las listas de vecinos de cada nodo de G, indexadas por indice de nodo.
+    Los indices que no existen en G tienen una lista vacia.
+
+    :param G: grafo G
+    :return: lista de listas de vecinos
+    """
+    cache = graph_cache(G)
+    if "adjacency" not in cache:
+        cache["adjacency"] = [neighbors.tolist() for neighbors in neighbor_arrays(G)]
+    return cache["adjacency"]
+
+
+def csr_adjacency(G):
+    """
+    Funcion que retorna la adyacencia de G en formato CSR: los vecinos de v son indices[indptr[v]:indptr[v + 1]]
+
+    :param G: grafo G
+    :return: arreglos de NumPy indptr e indices
+    """
+    G = mis_graph(G)
+    return G.indptr, G.indices
+
+
+def neighbor_arrays(G):
+    """
+    Funcion que retorna los vecinos de cada nodo de G como vistas de NumPy sobre la adyacencia CSR
+
+    :param G: grafo G
+    :return: lista de arreglos de vecinos
+    """
+    cache = graph_cache(G)
+    if "neighbor_arrays" not in cache:
+        indptr, indices = csr_adjacency(G)
+        cache["neighbor_arrays"] = np.split(indices, indptr[1:-1]) if len(indptr) > 1 else []
+    return cache["neighbor_arrays"]
+
+
+def degrees(G):
+    """
+    Funcion que retorna el grado de cada nodo de G, indexado por indice de nodo
+
+    :param G: grafo G
+    :return: arreglo de grados
+    """
+    return mis_graph(G).degrees
+
+
+def edge_sources(G):
+    """
+    Funcion que retorna, para cada entrada de la adyacencia CSR, el nodo del que sale: el lado k va de
+    edge_sources(G)[k] a indices[k]
+
+    :param G: grafo G
+    :return: arreglo paralelo a indices de la adyacencia CSR
+    """
+    cache = graph_cache(G)
+    if "edge_sources" not in cache:
+        cache["edge_sources"] = np.repeat(np.arange(len(degrees(G))), degrees(G))
+    return cache["edge_sources"]
+
+
+def degree_order(G):
+    """
+    Funcion que retorna los nodos de G ordenados de menor a mayor grado (ordenamiento estable, en empate por indice)
+
+    :param G: grafo G
+    :return: arreglo de indices de nodos
+    """
+    cache = graph_cache(G)
+    if "degree_order" not in cache:
+        nodes = mis_graph(G).nodes
+        cache["degree_order"] = nodes[np.argsort(degrees(G)[nodes], kind="stable")]
+    return cache["degree_order"]
+
+
+def two_hop_neighbors(G, v):
+    """
+    Funcion que retorna los nodos a distancia exactamente 2 de v. Se calculan la primera vez que se piden
+    (uniendo las vecindades de los vecinos de v, en O(deg^2)) y se guardan en el cache del grafo, que mantiene
+    solo las TWO_HOP_CACHE_SIZE usadas mas recientemente
+
+    :param G: grafo G
+    :param v: indice de nodo
+    :return: arreglo ordenado de nodos a distancia 2 de v
+    """
+    index = graph_cache(G).setdefault("two_hop", OrderedDict())
+    if v in index:
+        index.move_to_end(v)
+        return index[v]
+    nbrs = neighbor_arrays(G)
+    first = nbrs[v]
+    second = np.concatenate([nbrs[u] for u in first]) if len(first) > 0 else first
+    index[v] = np.setdiff1d(second, np.append(first, v))
+    if len(index) > TWO_HOP_CACHE_SIZE:
+        index.popitem(last=False)
+    return index[v]
+
+
+def induced_subgraph(G, nodes):
+    """
+    Funcion que construye el subgrafo inducido por nodes, con indices 0..k-1: el nodo i del subgrafo es nodes[i]
+
+    :param G: grafo G
+    :param nodes: arreglo ordenado de indices de nodos de G
+    :return: MISGraph del subgrafo inducido
+    """
+    G = mis_graph(G)
+    nodes = np.asarray(nodes, dtype=np.int64)
+    position = np.full(len(G.degrees), -1, dtype=np.int64)
+    position[nodes] = np.arange(len(nodes))
+
+    # Se juntan las filas CSR de los nodos y se descartan los vecinos que no estan en el subgrafo
+    lengths = G.degrees[nodes]
+    rows = np.repeat(np.arange(len(nodes)), lengths)
+    starts = np.repeat(G.indptr[nodes] - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    indices = position[G.indices[starts + np.arange(len(rows))]]
+    keep = indices >= 0
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(rows[keep], minlength=len(nodes)))
+    return MISGraph(indptr, indices[keep])
@@ -0,0 +1,170 @@
+import numpy as np
+
+from .graph import mis_graph, csr_adjacency, neighbor_arrays, degree_order
+from .validation import check_population
+
+# Una poblacion es una matriz de booleanos con un genotipo por fila (el gen i indica si el nodo i esta en S)
+# y un arreglo paralelo con la aptitud de cada genotipo. Todas las operaciones trabajan sobre la poblacion
+# completa con NumPy.
+
+# Si es true, cada poblacion reparada se revisa con check_population (para depurar, cuesta O(n + m) por genotipo)
+CHECK_POPULATIONS = False
+
+
+def generator(rng=None):
+    """
+    Funcion que retorna el generador aleatorio de los operadores de poblacion. Si no se da uno, se crea a partir
+    del estado global de np.random (sin cambiarlo mas que por una extraccion), de modo que np.random.seed sigue
+    haciendo reproducibles a los algoritmos que no manejan su propio generador
+
+    :param rng: generador de NumPy (np.random.Generator) o None
+    :return: generador de NumPy
+    """
+    return rng if rng is not None else np.random.default_rng(np.random.randint(2**32, dtype=np.int64))
+
+
+def init_population(n_nodes, pop_size, initial_set_size, rng=None):
+    """
+    Funcion que genera una poblacion inicial de genotipos de tamaño especificado donde el conjunto
+    que representa cada genotipo tambien tiene un tamaño especificado
+
+    :param n_nodes: numero de nodos del grafo
+    :param pop_size: tamaño de la población
+    :param initial_set_size: tamaño del conjunto representado por los genotipos generados
+    :param rng: generador aleatorio (ver generator)
+    :return pop: poblacion generada
+    """
+    pop = np.zeros((pop_size, n_nodes), dtype=bool)
+    rows = np.repeat(np.arange(pop_size), initial_set_size)
+    pop[rows, generator(rng).integers(0, n_nodes, len(rows))] = True
+    return pop
+
+
+def mutate(S, mutation_rate, rng=None):
+    """
+    Funcion que genera una mutacion de uno o varios genotipos en base a una tasa de mutacion
+
+    :param S: genotipo o poblacion a mutar
+    :param mutation_rate: tasa de mutacion, cada unidad representa un 0.1 de probabilidad de mutacion
+    :param rng: generador aleatorio (ver generator)
+    :return: genotipo o poblacion resultante de la mutacion
+    """
+    return S ^ (generator(rng).integers(0, 1001, S.shape, dtype=np.int16) < mutation_rate)
+
+
+def add_cross(S1, S2):
+    """
+    Funcion que cruza genotipos agregando todos los nodos de ambos en el genotipo resultante
+
+    :param S1: padre 1 (o matriz de padres)
+    :param S2: padre 2 (o matriz de padres)
+    :return: genotipo resultante del cruce
+    """
+    return S1 | S2
+
+
+def mix_cross(S1, S2, rng=None):
+    """
+    Funcion que cruza genotipos escogiendo aleatoriamente nodos de cada uno
+
+    :param S1: padre 1 (o matriz de padres)
+    :param S2: padre 2 (o matriz de padres)
+    :param rng: generador aleatorio (ver generator)
+    :return: genotipo resultante del cruce
+    """
+    return np.where(generator(rng).random(S1.shape) < 0.5, S1, S2)
+
+
+def random_pairs(pop_size, n_pairs, rng=None):
+    """
+    Funcion que escoge pares de individuos distintos de una poblacion
+
+    :param pop_size: tamaño de la población
+    :param n_pairs: cantidad de pares
+    :param rng: generador aleatorio (ver generator)
+    :return: dos arreglos con los indices del primer y segundo individuo de cada par
+    """
+    rng = generator(rng)
+    first = rng.integers(0, pop_size, n_pairs)
+    second = (first + rng.integers(1, pop_size, n_pairs)) % pop_size
+    return first, second
+
+
+def sort_population(pop, fit):
+    """
+    Funcion que ordena una poblacion de menor a mayor aptitud
+
+    :param pop: poblacion
+    :param fit: aptitud de cada genotipo
+    :return: poblacion y aptitudes ordenadas
+    """
+    order = np.argsort(fit, kind="stable")
+    return pop[order], fit[order]
+
+
+def repair(G, S):
+    """
+    Funcion que convierte un genotipo cualquiera en un conjunto independiente maximal en O(n + m). Primero saca
+    los nodos en conflicto (con algun vecino en S) de mayor a menor grado, y luego agrega los nodos libres
+    (sin vecinos en S) de menor a mayor grado
+
+    :param G: grafo del genotipo
+    :param S: genotipo
+    :return: genotipo reparado
+    """
+    indptr, indices = csr_adjacency(G)
+    nbrs = neighbor_arrays(G)
+    order = degree_order(G)
+    # Los indices que no son nodos del grafo nunca estan en S
+    S = np.array(S, dtype=bool) & mis_graph(G).active
+
+    # Numero de vecinos en S de cada nodo
+    count = np.bincount(indices[np.repeat(S, np.diff(indptr))], minlength=len(S))
+
+    for v in order[::-1][(S & (count > 0))[order[::-1]]].tolist():
+        if count[v] > 0:
+            S[v] = False
+            count[nbrs[v]] -= 1
+
+    for v in order[(~S & (count == 0))[order]].tolist():
+        if count[v] == 0:
+            S[v] = True
+            count[nbrs[v]] += 1
+    return S
+
+
+def repair_population(G, P):
+    """
+    Funcion que repara todos los genotipos de una poblacion (ver repair)
+
+    :param G: grafo de los genotipos
+    :param P: poblacion
+    :return: poblacion de conjuntos independientes maximales
+    """
+    R = np.zeros(np.shape(P), dtype=bool)
+    for i, S in enumerate(P):
+        R[i] = repair(G, S)
+    if CHECK_POPULATIONS:
+        independent, maximal = check_population(G, R)
+        assert independent.all() and maximal.all(), \
+            "genotipos no independientes: {}, no maximales: {}".format(
+                np.flatnonzero(~independent).tolist(), np.flatnonzero(~maximal).tolist())
+    return R
+
+
+def cardinality(P):
+    """
+    Funcion que calcula la aptitud de una poblacion reparada: el tamaño del conjunto de cada genotipo
+
+    :param P: poblacion (o genotipo)
+    :return: arreglo con la aptitud de cada genotipo
+    """
+    return np.count_nonzero(P, axis=-1)
+
+
+def decode(S):
+    """
+    :param S: genotipo
+    :return: lista de indices de los nodos del conjunto que representa
+    """
+    return np.flatnonzero(S).tolist()
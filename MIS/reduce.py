@@ -0,0 +1,333 @@
+import numpy as np
+
+from .graph import MISGraph, mis_graph, graph_cache
+from .population import repair
+from . import anytime
+
+
+def bits(x):
+    """
+    Funcion que recorre los indices de los bits encendidos de un bitset (entero de Python)
+
+    :param x: bitset
+    :return: generador con los indices de los bits encendidos, de menor a mayor
+    """
+    while x:
+        low = x & -x
+        yield low.bit_length() - 1
+        x ^= low
+
+
+def to_bitsets(G):
+    """
+    Funcion que construye la adyacencia de G como bitsets sobre indices 0..n-1
+
+    :param G: grafo G
+    :return: lista de nodos de G (para traducir indices) y lista de bitsets de adyacencia
+    """
+    nodes = list(G.node_indices())
+    position = {v: i for i, v in enumerate(nodes)}
+    adj = [0] * len(nodes)
+    for u, v in G.edge_list():
+        if u != v:
+            i, j = position[u], position[v]
+            adj[i] |= 1 << j
+            adj[j] |= 1 << i
+    return nodes, adj
+
+
+def lp_reduction(adj, alive):
+    """
+    Reduccion por la relajacion lineal (Nemhauser y Trotter): una solucion optima semi-entera del LP de cobertura
+    de vertices se obtiene de un emparejamiento maximo en el grafo bipartito con una copia izquierda y una derecha
+    de cada nodo (Hopcroft-Karp) y del teorema de Konig. Existe un MIS que contiene a los nodos con valor 0 y no
+    contiene a los de valor 1, por lo que solo quedan los nodos con valor 1/2.
+
+    :param adj: lista de bitsets de adyacencia
+    :param alive: bitset de los nodos que siguen en el grafo
+    :return: nodos tomados (valor 0) y bitset de los nodos que se sacan del grafo (valores 0 y 1)
+    """
+    nodes = list(bits(alive))
+    neighbors = {v: list(bits(adj[v] & alive)) for v in nodes}
+    match_left = {v: -1 for v in nodes}
+    match_right = {v: -1 for v in nodes}
+
+    # Emparejamiento inicial greedy
+    for u in nodes:
+        for v in neighbors[u]:
+            if match_right[v] < 0:
+                match_left[u], match_right[v] = v, u
+                break
+
+    while True:
+        # BFS por capas desde los nodos izquierdos libres
+        dist = {u: 0 if match_left[u] < 0 else -1 for u in nodes}
+        queue = [u for u in nodes if match_left[u] < 0]
+        found = False
+        for u in queue:
+            for v in neighbors[u]:
+                w = match_right[v]
+                if w < 0:
+                    found = True
+                elif dist[w] < 0:
+                    dist[w] = dist[u] + 1
+                    queue.append(w)
+        if not found:
+            break
+
+        # DFS iterativo por caminos de aumento que siguen las capas
+        pointer = {u: 0 for u in nodes}
+        for root in [u for u in nodes if match_left[u] < 0]:
+            stack, path = [root], []
+            while stack:
+                u = stack[-1]
+                if pointer[u] < len(neighbors[u]):
+                    v = neighbors[u][pointer[u]]
+                    pointer[u] += 1
+                    w = match_right[v]
+                    if w < 0:
+                        path.append(v)
+                        for a, b in zip(stack, path):
+                            match_left[a], match_right[b] = b, a
+                        break
+                    if dist[w] == dist[u] + 1:
+                        path.append(v)
+                        stack.append(w)
+                else:
+                    dist[u] = -1
+                    stack.pop()
+                    if path:
+                        path.pop()
+
+    # Konig: Z son los nodos alcanzables desde los izquierdos libres por caminos alternantes. La cobertura minima
+    # es (L - Z) U (R n Z), y el valor de v en el LP es la cantidad de sus copias en la cobertura dividida por 2
+    left = {u for u in nodes if match_left[u] < 0}
+    right = set()
+    queue = list(left)
+    for u in queue:
+        for v in neighbors[u]:
+            if v not in right:
+                right.add(v)
+                w = match_right[v]
+                if w not in left:
+                    left.add(w)
+                    queue.append(w)
+
+    taken = [v for v in nodes if v in left and v not in right]
+    removed = 0
+    for v in nodes:
+        if (v in left) == (v not in right):
+            removed |= 1 << v
+    return taken, removed
+
+
+def reduce_graph(adj, alive):
+    """
+    Funcion que aplica reducciones exactas para MIS: nodos de grado 0 y 1, nodos de grado 2 (en triangulo o por
+    plegado), dominancia y, cuando las anteriores no reducen mas, la relajacion lineal. Modifica adj, agregando un
+    nodo nuevo por cada plegado.
+
+    :param adj: lista de bitsets de adyacencia
+    :param alive: bitset de los nodos que siguen en el grafo
+    :return: nodos tomados, bitset de los nodos restantes y log de plegados (v, a, b, w)
+    """
+    taken = []
+    folds = []
+    changed = True
+    while changed:
+        changed = False
+
+        # Grados 0, 1 y 2
+        for v in bits(alive):
+            if not (alive >> v) & 1:
+                continue
+            neighbors = adj[v] & alive
+            degree = neighbors.bit_count()
+
+            # Grado 0 o 1: siempre existe un MIS que contiene a v
+            if degree <= 1:
+                taken.append(v)
+                alive &= ~(neighbors | (1 << v))
+                changed = True
+            elif degree == 2:
+                a, b = bits(neighbors)
+                # Si a y b son vecinos, v es simplicial y se puede tomar
+                if (adj[a] >> b) & 1:
+                    taken.append(v)
+                    alive &= ~(neighbors | (1 << v))
+                else:
+                    # Plegado: v, a y b se reemplazan por un nodo w vecino de N(a) U N(b).
+                    # Si w queda en la solucion se toman a y b, si no se toma v
+                    w = len(adj)
+                    w_neighbors = (adj[a] | adj[b]) & alive & ~(neighbors | (1 << v))
+                    adj.append(w_neighbors)
+                    for u in bits(w_neighbors):
+                        adj[u] |= 1 << w
+                    alive = (alive & ~(neighbors | (1 << v))) | (1 << w)
+                    folds.append((v, a, b, w))
+                changed = True
+
+        if changed:
+            continue
+
+        # Dominancia: si u y v son vecinos y N[v] esta contenido en N[u], existe un MIS sin u.
+        # Los vecindarios cerrados y grados se calculan una vez por pasada; solo se comparan con los nodos vivos
+        closed = {u: adj[u] | (1 << u) for u in bits(alive)}
+        degree = {u: (adj[u] & alive).bit_count() for u in closed}
+        for u in closed:
+            for v in bits(adj[u] & alive):
+                if degree[v] <= degree[u] and closed[v] & ~closed[u] & alive == 0:
+                    alive &= ~(1 << u)
+                    changed = True
+                    break
+
+        if changed or not alive:
+            continue
+
+        # Relajacion lineal
+        lp_taken, removed = lp_reduction(adj, alive)
+        if removed:
+            taken.extend(lp_taken)
+            alive &= ~removed
+            changed = True
+
+    return taken, alive, folds
+
+
+def lift_folds(S, folds):
+    """
+    Funcion que deshace los plegados de grado 2 sobre una solucion del grafo reducido
+
+    :param S: conjunto solucion del grafo reducido
+    :param folds: log de plegados (v, a, b, w) en el orden en que se hicieron
+    :return: conjunto solucion del grafo original
+    """
+    for v, a, b, w in reversed(folds):
+        if w in S:
+            S.discard(w)
+            S.update((a, b))
+        else:
+            S.add(v)
+    return S
+
+
+class Reduction:
+    """
+    Resultado de reducir un grafo G: el kernel, un MISGraph con indices 0..k-1, y el log para reconstruir una
+    solucion de G a partir de una del kernel. Todo conjunto independiente del kernel se lleva a uno de G con
+    exactamente offset nodos mas, por lo que un MIS del kernel da un MIS de G.
+    """
+
+    def __init__(self, G, kernel, nodes=None, original=None, taken=(), folds=()):
+        """
+        :param G: grafo original
+        :param kernel: grafo reducido, o G si no hubo reducciones
+        :param nodes: nodo interno (ver reduce_graph) de cada indice del kernel
+        :param original: indice en G de cada nodo interno que no es un plegado
+        :param taken: nodos internos tomados por las reducciones
+        :param folds: log de plegados (v, a, b, w) sobre nodos internos
+        """
+        self.graph = G
+        self.kernel = kernel
+        self.nodes = nodes
+        self.original = original
+        self.taken = list(taken)
+        self.folds = list(folds)
+        self.offset = len(self.taken) + len(self.folds)
+
+    def identity(self):
+        """
+        :return: true si el kernel es el grafo original
+        """
+        return self.nodes is None
+
+    def lift(self, S):
+        """
+        Funcion que lleva una solucion del kernel a G. Al final se completa con los nodos libres de G, de modo
+        que el resultado es maximal aunque la solucion del kernel no lo sea
+
+        :param S: conjunto independiente del kernel
+        :return: lista ordenada de indices de G que conforman un conjunto independiente maximal
+        """
+        if self.identity():
+            return list(S)
+        S = lift_folds(set(self.taken) | {self.nodes[i] for i in S}, self.folds)
+        mask = np.zeros(len(self.graph.active), dtype=bool)
+        mask[[self.original[v] for v in S]] = True
+        return np.flatnonzero(repair(self.graph, mask)).tolist()
+
+
+def compute_reduction(G):
+    """
+    Funcion que reduce G con reduce_graph y construye el kernel
+
+    :param G: grafo G
+    :return: Reduction de G
+    """
+    nodes, adj = to_bitsets(G)
+    full = (1 << len(nodes)) - 1
+    taken, alive, folds = reduce_graph(adj, full)
+    if alive == full and not folds:
+        return Reduction(G, G)
+
+    kernel_nodes = list(bits(alive))
+    position = {v: i for i, v in enumerate(kernel_nodes)}
+    rows = [[position[u] for u in bits(adj[v] & alive)] for v in kernel_nodes]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(row) for row in rows])
+    indices = np.fromiter((u for row in rows for u in row), dtype=np.int64, count=int(indptr[-1]))
+    return Reduction(G, MISGraph(indptr, indices), kernel_nodes, nodes, taken, folds)
+
+
+def kernelize(G):
+    """
+    Funcion que retorna la reduccion de G. Se calcula una sola vez por grafo y se guarda en su cache
+
+    :param G: grafo G
+    :return: Reduction de G
+    """
+    G = mis_graph(G)
+    cache = graph_cache(G)
+    if "reduction" not in cache:
+        cache["reduction"] = compute_reduction(G)
+    return cache["reduction"]
+
+
+def MIS_reduced(G, algorithm, *args):
+    """
+    Funcion que ejecuta un algoritmo de MIS sobre el kernel de G y lleva su solucion a G. Las soluciones que el
+    algoritmo publica (ver anytime) tambien se llevan a G, por lo que el incumbente siempre es una solucion de G
+
+    :param G: grafo G
+    :param algorithm: funcion MIS_* a ejecutar, recibe el grafo y args
+    :param args: argumentos de algorithm despues del grafo
+    :return: indices del grafo que conforman un conjunto independiente maximal
+    """
+    reduction = kernelize(G)
+    if len(reduction.kernel) == 0:
+        S = reduction.lift([])
+        anytime.publish(S)
+        return S
+    if reduction.identity():
+        return algorithm(G, *args)
+
+    anytime.push_lift(reduction.lift, reduction.offset)
+    try:
+        S = algorithm(reduction.kernel, *args)
+    finally:
+        anytime.pop_lift()
+    return reduction.lift(S)
+
+
+def reduced(algorithm):
+    """
+    Funcion que retorna una version de un algoritmo de MIS que se ejecuta sobre el kernel (ver MIS_reduced),
+    con el mismo nombre
+
+    :param algorithm: funcion MIS_* a ejecutar, recibe el grafo y sus argumentos
+    :return: funcion que recibe el grafo y los argumentos de algorithm
+    """
+    def solve(G, *args):
+        return MIS_reduced(G, algorithm, *args)
+    solve.__name__ = algorithm.__name__
+    return solve
@@ -0,0 +1,170 @@
+import numpy as np
+
+from .graph import adjacency_lists, neighbor_arrays
+
+
+class VertexSet:
+    """
+    Conjunto de vertices con insercion, borrado y eleccion aleatoria en O(1).
+    Los vertices se guardan en una lista y cada uno recuerda su posicion en ella.
+    """
+
+    def __init__(self, size):
+        self.items = []
+        self.position = [-1] * size
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __contains__(self, v):
+        return self.position[v] >= 0
+
+    def add(self, v):
+        self.position[v] = len(self.items)
+        self.items.append(v)
+
+    def remove(self, v):
+        i = self.position[v]
+        last = self.items.pop()
+        if last != v:
+            self.items[i] = last
+            self.position[last] = i
+        self.position[v] = -1
+
+
+class SolutionState:
+    """
+    Estado incremental de una solucion S de MIS sobre un grafo G. Para cada vertice se guarda si esta en S y
+    su tightness (numero de vecinos en S). Los vertices fuera de S se agrupan por tightness en V0 (libres),
+    V1, V2 y V>2. Agregar o sacar un vertice v de S cuesta O(deg(v)) y las consultas de las vecindades,
+    del tamano de S y de los conflictos (lados dentro de S) son O(1).
+
+    S puede no ser independiente (por ejemplo en recocido simulado), en ese caso conflicts es el numero
+    de lados del grafo inducido por S.
+
+    Si no se necesitan las subvecindades (buckets=False), no se mantienen V0, V1, V2 y V>2 y la tightness
+    se actualiza de forma vectorizada con NumPy, lo que es mucho mas rapido en grafos densos.
+    """
+
+    def __init__(self, G, S=(), buckets=True):
+        """
+        :param G: grafo G
+        :param S: solucion inicial
+        :param buckets: si se mantienen las subvecindades V0, V1, V2 y V>2
+        """
+        self.adj = adjacency_lists(G)
+        size = len(self.adj)
+        self.in_S = bytearray(size)
+        self.conflicts = 0
+        self.S = VertexSet(size)
+        if buckets:
+            self.tightness = [0] * size
+            # Suma de los indices de los vecinos en S. Si la tightness de v es 1, es justamente su unico vecino en S
+            self.mate = [0] * size
+            self.V = [VertexSet(size) for _ in range(4)]
+            for v in G.node_indices():
+                self.V[0].add(v)
+        else:
+            self.neighbor_arrays = neighbor_arrays(G)
+            self.tightness = np.zeros(size, dtype=np.int64)
+            self.mate = np.zeros(size, dtype=np.int64)
+            self.V = None
+        for v in S:
+            self.add(v)
+
+    def __len__(self):
+        return len(self.S)
+
+    def __contains__(self, v):
+        return self.in_S[v] == 1
+
+    def add(self, v):
+        """
+        Funcion que agrega v a S actualizando la tightness de sus vecinos
+
+        :param v: vertice fuera de S
+        """
+        self.S.add(v)
+        self.in_S[v] = 1
+        self.conflicts += int(self.tightness[v])
+        if self.V is None:
+            neighbors = self.neighbor_arrays[v]
+            self.tightness[neighbors] += 1
+            self.mate[neighbors] += v
+            return
+        self.V[min(self.tightness[v], 3)].remove(v)
+        tightness, in_S, V = self.tightness, self.in_S, self.V
+        for u in self.adj[v]:
+            t = tightness[u]
+            tightness[u] = t + 1
+            self.mate[u] += v
+            if not in_S[u] and t < 3:
+                V[t].remove(u)
+                V[t + 1].add(u)
+
+    def remove(self, v):
+        """
+        Funcion que saca v de S actualizando la tightness de sus vecinos
+
+        :param v: vertice en S
+        """
+        self.S.remove(v)
+        self.in_S[v] = 0
+        self.conflicts -= int(self.tightness[v])
+        if self.V is None:
+            neighbors = self.neighbor_arrays[v]
+            self.tightness[neighbors] -= 1
+            self.mate[neighbors] -= v
+            return
+        self.V[min(self.tightness[v], 3)].add(v)
+        tightness, in_S, V = self.tightness, self.in_S, self.V
+        for u in self.adj[v]:
+            t = tightness[u]
+            tightness[u] = t - 1
+            self.mate[u] -= v
+            if not in_S[u] and t <= 3:
+                V[t].remove(u)
+                V[t - 1].add(u)
+
+    def flip(self, v):
+        """
+        Funcion que saca v de S si esta en S, o lo agrega si no
+
+        :param v: vertice del grafo
+        """
+        if self.in_S[v]:
+            self.remove(v)
+        else:
+            self.add(v)
+
+    def solution_neighbors(self, v):
+        """
+        Funcion que retorna los vecinos de v que estan en S. Es O(1) si v tiene un solo vecino en S
+
+        :param v: vertice del grafo
+        :return: lista de vecinos de v en S
+        """
+        if self.tightness[v] == 1:
+            return [int(self.mate[v])]
+        if self.tightness[v] == 0:
+            return []
+        in_S = self.in_S
+        return [u for u in self.adj[v] if in_S[u]]
+
+    def objective(self, c=2):
+        """
+        Funcion objetivo penalizada -|S| + c * (lados dentro de S), a minimizar
+
+        :param c: penalizacion por cada lado dentro de S
+        :return: valor de la funcion objetivo
+        """
+        return -len(self.S) + c * self.conflicts
+
+    def solution(self):
+        """
+        :return: conjunto con los vertices de S
+        """
+        return set(self.S.items)
@@ -0,0 +1,94 @@
+import numpy as np
+
+from .graph import mis_graph, csr_adjacency, edge_sources
+
+# Validacion de soluciones de MIS sobre la adyacencia CSR del grafo. Una solucion es una lista de indices de nodos
+# o un genotipo (arreglo de booleanos indexado por nodo), y una poblacion es una matriz de genotipos. Cada solucion
+# se revisa en O(n + m) con operaciones de NumPy sobre todos los lados a la vez.
+
+# Cantidad maxima de elementos (genotipos x entradas de la adyacencia) que se revisan juntos en check_population
+VALIDATION_CHUNK = 1 << 24
+
+
+def solution_mask(G, S):
+    """
+    Funcion que convierte una solucion en un arreglo de booleanos indexado por nodo
+
+    :param G: grafo G
+    :param S: lista (o conjunto) de indices de nodos o genotipo
+    :return: arreglo de booleanos, true si el nodo esta en S
+    """
+    indptr, _ = csr_adjacency(G)
+    mask = np.zeros(len(indptr) - 1, dtype=bool)
+    S = S if isinstance(S, np.ndarray) else np.asarray(list(S))
+    if S.dtype == bool:
+        width = min(len(S), len(mask))
+        mask[:width] = S[:width]
+    else:
+        mask[S.astype(np.int64)] = True
+    return mask
+
+
+def check_solution(G, S):
+    """
+    Funcion que revisa si una solucion es un conjunto independiente maximal y retorna por que no lo es
+
+    :param G: grafo G
+    :param S: lista de indices de nodos o genotipo
+    :return: lados en conflicto (matriz de pares u < v con ambos nodos en S) y nodos no cubiertos
+    (fuera de S y sin vecinos en S)
+    """
+    _, indices = csr_adjacency(G)
+    sources = edge_sources(G)
+    in_S = solution_mask(G, S)
+
+    conflict = in_S[sources] & in_S[indices] & (sources < indices)
+    conflicts = np.column_stack((sources[conflict], indices[conflict]))
+
+    covered = in_S.copy()
+    covered[indices[in_S[sources]]] = True
+    nodes = mis_graph(G).nodes
+    uncovered = nodes[~covered[nodes]]
+    return conflicts, uncovered
+
+
+def is_MIS(G, S):
+    """
+    Funcion que recibe un grafo G y un conjunto S de indices de nodos y determina si S es un conjunto independiente maximal
+
+    :param G: grafo dado
+    :param S: posible conjunto independiente maximal de G (lista de indices de nodos o genotipo)
+    :return: true si S es MIS para G, false si no
+    """
+    conflicts, uncovered = check_solution(G, S)
+    return len(conflicts) == 0 and len(uncovered) == 0
+
+
+def check_population(G, P):
+    """
+    Funcion que revisa todos los genotipos de una poblacion. Para cada genotipo y cada nodo se calcula si tiene
+    algun vecino en S reduciendo, con logical_or.reduceat, los tramos de la adyacencia CSR de cada nodo
+
+    :param G: grafo G
+    :param P: poblacion, matriz de booleanos con un genotipo por fila
+    :return: arreglos con, para cada genotipo, si es independiente y si es maximal
+    """
+    indptr, indices = csr_adjacency(G)
+    P = np.asarray(P, dtype=bool)
+    X = np.zeros((len(P), len(indptr) - 1), dtype=bool)
+    width = min(P.shape[1], X.shape[1])
+    X[:, :width] = P[:, :width]
+    nodes = mis_graph(G).nodes
+    nonempty = np.diff(indptr) > 0
+
+    independent = np.ones(len(P), dtype=bool)
+    maximal = np.ones(len(P), dtype=bool)
+    rows = max(1, VALIDATION_CHUNK // max(len(indices), 1))
+    for i in range(0, len(P), rows):
+        chunk = X[i:i + rows]
+        covered = np.zeros(chunk.shape, dtype=bool)
+        if len(indices) > 0:
+            covered[:, nonempty] = np.logical_or.reduceat(chunk[:, indices], indptr[:-1][nonempty], axis=1)
+        independent[i:i + rows] = ~(chunk & covered).any(axis=1)
+        maximal[i:i + rows] = (chunk | covered)[:, nodes].all(axis=1)
+    return independent, maximal
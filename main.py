@@ -1,16 +1,38 @@
-from MIS.functions import test_benchmark, test_defined_graphs
-from sys import argv
+from MIS.functions import test_benchmark, test_benchmark_parallel, test_defined_graphs
+from sys import argv, exit
 
 if __name__ == "__main__":
 
+    # Opciones que agregan filas al benchmark, pueden ir en cualquier posicion (ver benchmark_algorithms):
+    # reduce, components, exact y component_workers=<procesos>
+    flags = {"reduce": "reduce", "components": "components", "exact": "exact_components"}
+    options = {flags[arg]: True for arg in argv[1:] if arg in flags}
+    workers_options = [arg.split("=", 1)[1] for arg in argv[1:] if arg.startswith("component_workers=")]
+    argv = [arg for arg in argv if arg not in flags and not arg.startswith("component_workers=")]
+
+    def usage():
+        print(f"Usage: {argv[0]} <project_part> <time_minutes> <defined_graph: optional> [options]")
+        print(f"       {argv[0]} <project_part> <time_minutes> parallel <workers: optional> <seeds: optional> [options]")
+        print(f"options: reduce, components, exact, component_workers=<workers>")
+
     try:
+        for value in workers_options:
+            if not value.isdigit() or int(value) < 1:
+                print(f"Error: component_workers must be a positive integer")
+                usage()
+                exit(1)
+            options["component_workers"] = int(value)
         project_part = int(argv[1])
         time = int(argv[2])*60
-        if (len(argv) == 4 and bool(argv[3])):
-            test_defined_graphs(time, project_part)
+        if (len(argv) >= 4 and argv[3] == "parallel"):
+            workers = int(argv[4]) if len(argv) >= 5 else None
+            seeds = int(argv[5]) if len(argv) >= 6 else 1
+            test_benchmark_parallel(time, project_part, workers, seeds, **options)
+        elif (len(argv) == 4 and bool(argv[3])):
+            test_defined_graphs(time, project_part, **options)
         else:
-            test_benchmark(time, project_part)
+            test_benchmark(time, project_part, **options)
     except IndexError:
-        print(f"Usage: {argv[0]} <project_part> <time_minutes> <defined_graph: optional>")
+        usage()
     except ValueError as e:
-        print(f"Error: <time> must be a numeric value representing minutes")
+        print(f"Error: <time> must be a numeric value representing minutes")
\ No newline at end of file